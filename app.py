@@ -1,14 +1,9 @@
 import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
-import librosa
-import soundfile as sf
-from scipy import signal
-from pydub import AudioSegment
-import io
 import tempfile
 import os
 from datetime import datetime
+from engine_plan import get_plan, modulate, with_sample_rate
 
 # Page configuration
 st.set_page_config(
@@ -72,6 +67,8 @@ def generate_sample_data():
 
 def create_line_graph(x, y):
     """Create an interactive line graph using Plotly"""
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -106,25 +103,20 @@ def create_line_graph(x, y):
     return fig
 
 def apply_waveform_modulation(audio_data, sample_rate, waveform_data):
-    """Apply waveform modulation to audio based on graph data"""
-    # Normalize waveform data to audio length
-    audio_length = len(audio_data)
-    waveform_resampled = signal.resample(waveform_data, audio_length)
-    
-    # Normalize waveform to reasonable modulation range
-    waveform_normalized = waveform_resampled / np.max(np.abs(waveform_resampled)) * 0.3
-    
-    # Apply modulation
-    modulated_audio = audio_data * (1 + waveform_normalized)
-    
-    # Ensure we don't clip
-    if np.max(np.abs(modulated_audio)) > 1.0:
-        modulated_audio = modulated_audio / np.max(np.abs(modulated_audio)) * 0.95
-    
-    return modulated_audio
+    """Apply waveform modulation to audio based on graph data
+
+    Uses the same envelope, loudness target and limiter as app_unified.py
+    (engine_plan.modulate), at the recording's sample rate.
+    """
+    if audio_data is None or len(audio_data) == 0:
+        return None
+
+    return modulate(audio_data, waveform_data, with_sample_rate(get_plan(), sample_rate))
 
 def save_audio(audio_data, sample_rate, filename):
     """Save audio data to a temporary file"""
+    import soundfile as sf
+
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
     sf.write(temp_file.name, audio_data, sample_rate)
     return temp_file.name
@@ -1,14 +1,9 @@
 import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
-import librosa
-import soundfile as sf
-from scipy import signal
-from pydub import AudioSegment
-import io
 import tempfile
 import os
 from datetime import datetime
+from engine_plan import get_plan, modulate, with_sample_rate
 from audio_recorder import record_audio_component, save_audio_file, get_audio_duration
 
 # Page configuration
@@ -79,6 +74,8 @@ def generate_sample_data():
 
 def create_line_graph(x, y):
     """Create an interactive line graph using Plotly"""
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -113,25 +110,15 @@ def create_line_graph(x, y):
     return fig
 
 def apply_waveform_modulation(audio_data, sample_rate, waveform_data):
-    """Apply waveform modulation to audio based on graph data"""
+    """Apply waveform modulation to audio based on graph data
+
+    Uses the same envelope, loudness target and limiter as app_unified.py
+    (engine_plan.modulate), at the recording's sample rate.
+    """
     if audio_data is None or len(audio_data) == 0:
         return None
-    
-    # Normalize waveform data to audio length
-    audio_length = len(audio_data)
-    waveform_resampled = signal.resample(waveform_data, audio_length)
-    
-    # Normalize waveform to reasonable modulation range
-    waveform_normalized = waveform_resampled / np.max(np.abs(waveform_resampled)) * 0.3
-    
-    # Apply modulation
-    modulated_audio = audio_data * (1 + waveform_normalized)
-    
-    # Ensure we don't clip
-    if np.max(np.abs(modulated_audio)) > 1.0:
-        modulated_audio = modulated_audio / np.max(np.abs(modulated_audio)) * 0.95
-    
-    return modulated_audio
+
+    return modulate(audio_data, waveform_data, with_sample_rate(get_plan(), sample_rate))
 
 def create_audio_visualization(audio_data, sample_rate, title):
     """Create a simple waveform visualization for audio"""
@@ -142,6 +129,8 @@ def create_audio_visualization(audio_data, sample_rate, title):
     downsample_factor = max(1, len(audio_data) // 1000)
     audio_vis = audio_data[::downsample_factor]
     
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         y=audio_vis,
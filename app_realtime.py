@@ -1,17 +1,13 @@
 import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
-import tempfile
-import os
 from datetime import datetime
-from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
-import av
-import threading
-import queue
 import time
-import soundfile as sf
 from io import BytesIO
 
+from config import AUDIO_CONFIG
+from engine_plan import get_plan, modulate
+from loudness import normalize_loudness
+
 # Page configuration
 st.set_page_config(
     page_title="Data Notes - Voice Waveform Transformation",
@@ -234,9 +230,10 @@ class AudioRecorder:
             if len(audio_data) < 4410:  # Less than 0.1 seconds
                 return None
                 
-            # Normalize audio
-            if np.max(np.abs(audio_data)) > 0:
-                audio_data = audio_data / np.max(np.abs(audio_data)) * 0.8
+            # Normalize loudness (in place, peaks limited to the clip ceiling)
+            audio_data = audio_data.astype(np.float32)
+            normalize_loudness(audio_data, self.sample_rate, AUDIO_CONFIG["record_loudness"],
+                               AUDIO_CONFIG["clip_ceiling"])
                 
             return audio_data
             
@@ -265,6 +262,8 @@ def generate_waveform_data():
 
 def create_waveform_plot(x, y):
     """Create the main waveform visualization"""
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -318,6 +317,8 @@ def create_audio_visualization(audio_data, title):
     downsample_factor = max(1, len(audio_data) // 1000)
     audio_vis = audio_data[::downsample_factor]
     
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         y=audio_vis,
@@ -346,38 +347,24 @@ def create_audio_visualization(audio_data, title):
     return fig
 
 def apply_waveform_transformation(audio_data, waveform_data):
-    """Apply waveform transformation to audio"""
+    """Apply waveform transformation to audio
+
+    Uses the same envelope, loudness target and limiter as app_unified.py
+    (engine_plan.modulate).
+    """
     if audio_data is None or len(audio_data) == 0:
         return None
     
     try:
-        audio_length = len(audio_data)
-        
-        # Resample waveform to match audio length
-        waveform_resampled = np.interp(
-            np.linspace(0, 1, audio_length),
-            np.linspace(0, 1, len(waveform_data)),
-            waveform_data
-        )
-        
-        # Normalize waveform for modulation
-        waveform_normalized = waveform_resampled / np.max(np.abs(waveform_resampled)) * 0.4
-        
-        # Apply amplitude modulation
-        transformed_audio = audio_data * (1 + waveform_normalized)
-        
-        # Prevent clipping
-        if np.max(np.abs(transformed_audio)) > 1.0:
-            transformed_audio = transformed_audio / np.max(np.abs(transformed_audio)) * 0.95
-        
-        return transformed_audio
-        
+        return modulate(audio_data, waveform_data, get_plan())
     except Exception as e:
         st.error(f"Transformation error: {str(e)}")
         return None
 
 def save_audio_to_bytes(audio_data, sample_rate, format='wav'):
     """Save audio data to bytes for download"""
+    import soundfile as sf
+
     try:
         buffer = BytesIO()
         sf.write(buffer, audio_data, sample_rate, format=format)
@@ -389,6 +376,8 @@ def save_audio_to_bytes(audio_data, sample_rate, format='wav'):
 
 def create_audio_recorder():
     """Create WebRTC audio recorder"""
+    from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
+
     rtc_configuration = RTCConfiguration({
         "iceServers": [
             {"urls": ["stun:stun.l.google.com:19302"]},
@@ -1,9 +1,9 @@
 import streamlit as st
-import plotly.graph_objects as go
 import numpy as np
 import tempfile
 import os
 from datetime import datetime
+from engine_plan import get_plan, modulate
 
 # Page configuration
 st.set_page_config(
@@ -121,6 +121,8 @@ def generate_sample_data():
 
 def create_line_graph(x, y):
     """Create an interactive line graph using Plotly"""
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -163,6 +165,8 @@ def create_audio_visualization(audio_data, title):
     downsample_factor = max(1, len(audio_data) // 1000)
     audio_vis = audio_data[::downsample_factor]
     
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         y=audio_vis,
@@ -186,30 +190,14 @@ def create_audio_visualization(audio_data, title):
     return fig
 
 def apply_waveform_modulation(audio_data, waveform_data):
-    """Apply waveform modulation to audio based on graph data"""
+    """Apply waveform modulation to audio based on graph data
+
+    Uses the same envelope, loudness target and limiter as app_unified.py
+    (engine_plan.modulate).
+    """
     if audio_data is None or len(audio_data) == 0:
         return None
-    
-    # Simple modulation: multiply audio by waveform envelope
-    # Normalize waveform to audio length
-    audio_length = len(audio_data)
-    waveform_resampled = np.interp(
-        np.linspace(0, 1, audio_length),
-        np.linspace(0, 1, len(waveform_data)),
-        waveform_data
-    )
-    
-    # Normalize waveform to reasonable modulation range
-    waveform_normalized = waveform_resampled / np.max(np.abs(waveform_resampled)) * 0.3
-    
-    # Apply modulation
-    modulated_audio = audio_data * (1 + waveform_normalized)
-    
-    # Ensure we don't clip
-    if np.max(np.abs(modulated_audio)) > 1.0:
-        modulated_audio = modulated_audio / np.max(np.abs(modulated_audio)) * 0.95
-    
-    return modulated_audio
+    return modulate(audio_data, waveform_data, get_plan())
 
 def main():
     # Header
@@ -0,0 +1,291 @@
+import dataclasses
+
+import streamlit as st
+from datetime import datetime
+
+from config import UI_CONFIG, VISUALIZATION_CONFIG, FILE_CONFIG
+from engine_plan import (
+    get_plan, generate_waveform_data, simulate_recording, prepare_recording,
+    MODULATION_MODES, modulate, spatialize, encode_wav
+)
+from oscillator_bank import sonify_series
+
+# The plan is compiled once per process and shared by every session and rerun
+PLAN = get_plan()
+
+# Page configuration
+st.set_page_config(
+    page_title=UI_CONFIG["page_title"],
+    page_icon=UI_CONFIG["page_icon"],
+    layout=UI_CONFIG["layout"],
+    initial_sidebar_state=UI_CONFIG["initial_sidebar_state"]
+)
+
+# Custom CSS for better styling
+st.markdown(f"""
+<style>
+    .main-header {{
+        font-size: 3rem;
+        font-weight: bold;
+        text-align: center;
+        color: {UI_CONFIG["main_color"]};
+        margin-bottom: 2rem;
+    }}
+    .sub-header {{
+        font-size: 1.5rem;
+        color: {UI_CONFIG["secondary_color"]};
+        text-align: center;
+        margin-bottom: 1rem;
+    }}
+    .recording-status {{
+        text-align: center;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 1rem 0;
+        font-weight: 600;
+    }}
+    .recording-active {{
+        background-color: #ffebee;
+        border: 2px solid #f44336;
+        color: #b71c1c;
+    }}
+    .recording-inactive {{
+        background-color: #e8f5e8;
+        border: 2px solid #4caf50;
+        color: #1b5e20;
+    }}
+</style>
+""", unsafe_allow_html=True)
+
+
+def _render_modulated(audio_data, waveform_data, mode):
+    """Modulate audio with the graph data and pan it across the output channels with the same data
+
+    Returns the modulated audio and its WAV encoding, shared by the player and the download.
+    """
+    plan = PLAN if mode == PLAN.modulation_mode else dataclasses.replace(PLAN, modulation_mode=mode)
+    modulated = spatialize(modulate(audio_data, waveform_data, plan), waveform_data, plan)
+    if modulated is None:
+        return None, None
+    return modulated, encode_wav(modulated, PLAN)
+
+
+def _encode_recording(audio_data):
+    """Encode the original recording as WAV for the player and the download"""
+    return encode_wav(audio_data, PLAN)
+
+
+def _render_sonification(waveform_data):
+    """Play the graph data directly as pitch, without a recording"""
+    return encode_wav(sonify_series(waveform_data, PLAN), PLAN)
+
+
+if PLAN.render_cache_size > 0:
+    render_modulated = st.cache_data(max_entries=PLAN.render_cache_size, show_spinner=False)(_render_modulated)
+    render_sonification = st.cache_data(max_entries=PLAN.render_cache_size, show_spinner=False)(_render_sonification)
+    encode_recording = st.cache_data(max_entries=PLAN.render_cache_size, show_spinner=False)(_encode_recording)
+else:
+    render_modulated = _render_modulated
+    encode_recording = _encode_recording
+    render_sonification = _render_sonification
+
+
+def create_line_graph(x, y):
+    """Create an interactive line graph using Plotly"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        mode='lines',
+        name='Data Waveform',
+        line=dict(color=UI_CONFIG["main_color"], width=VISUALIZATION_CONFIG["line_width"]),
+        fill='tonexty',
+        fillcolor=f'rgba(31, 119, 180, {VISUALIZATION_CONFIG["fill_opacity"]})'
+    ))
+
+    fig.update_layout(
+        title={
+            'text': 'Data Waveform - Observe and Describe',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 20}
+        },
+        xaxis_title='Time',
+        yaxis_title='Amplitude',
+        height=VISUALIZATION_CONFIG["graph_height"],
+        showlegend=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor=VISUALIZATION_CONFIG["grid_color"])
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor=VISUALIZATION_CONFIG["grid_color"])
+    return fig
+
+
+def create_audio_visualization(audio_data, title):
+    """Create a downsampled waveform visualization for audio"""
+    if audio_data is None or len(audio_data) == 0:
+        return None
+
+    import plotly.graph_objects as go
+
+    downsample_factor = max(1, len(audio_data) // 1000)
+    samples = audio_data[::downsample_factor]
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)  # Plot multichannel audio as its downmix
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        y=samples,
+        mode='lines',
+        line=dict(color='#2ecc71', width=1),
+        name='Audio Waveform'
+    ))
+
+    fig.update_layout(
+        title=title,
+        height=VISUALIZATION_CONFIG["audio_vis_height"],
+        showlegend=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+
+    fig.update_xaxes(showgrid=False, showticklabels=False)
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor=VISUALIZATION_CONFIG["grid_color"])
+    return fig
+
+
+def create_recorder():
+    """Return the WebRTC recorder, or None when running in simulated mode"""
+    if PLAN.recording_mode != "webrtc":
+        return None
+    try:
+        from audio_recorder import create_audio_recorder
+    except ImportError:
+        st.info("🔄 streamlit-webrtc is not installed, using simulated recording.")
+        return None
+    _, recorder = create_audio_recorder()
+    return recorder
+
+
+def recording_controls():
+    """Render the recording buttons and store finished recordings in session state"""
+    recorder = create_recorder()
+    is_recording = recorder.recording if recorder is not None else st.session_state.recording
+
+    if is_recording:
+        st.markdown('<div class="recording-status recording-active">🎙️ Recording... Speak now!</div>',
+                    unsafe_allow_html=True)
+        if st.button("⏹️ Stop Recording", type="secondary", use_container_width=True):
+            if recorder is not None:
+                audio_data = recorder.stop_recording()
+            else:
+                st.session_state.recording = False
+                audio_data = simulate_recording(PLAN)
+
+            if audio_data is not None and len(audio_data) > 0:
+                st.session_state.audio_data = prepare_recording(audio_data, PLAN)
+            else:
+                st.error("❌ Recording failed. Please try again.")
+            st.rerun()
+    else:
+        st.markdown('<div class="recording-status recording-inactive">⏸️ Ready to record</div>',
+                    unsafe_allow_html=True)
+        if st.button("🎙️ Start Recording", type="primary", use_container_width=True):
+            if recorder is not None:
+                recorder.start_recording()
+            else:
+                st.session_state.recording = True
+            st.rerun()
+
+
+def main():
+    # Header
+    st.markdown('<h1 class="main-header">Data Notes</h1>', unsafe_allow_html=True)
+    st.markdown('<p class="sub-header">Data Sonification Through Voice Modulation</p>', unsafe_allow_html=True)
+
+    if 'recording' not in st.session_state:
+        st.session_state.recording = False
+    if 'audio_data' not in st.session_state:
+        st.session_state.audio_data = None
+    if 'waveform' not in st.session_state:
+        # Keep the graph stable across reruns so cached renders stay valid
+        st.session_state.waveform = generate_waveform_data(PLAN)
+
+    x, y = st.session_state.waveform
+    st.plotly_chart(create_line_graph(x, y), use_container_width=True)
+
+    # Data-only sonification: no microphone needed
+    st.markdown("## Listen to the Data")
+    st.audio(render_sonification(y), format="audio/wav")
+    st.caption("Higher values play higher pitches")
+
+    # Recording section
+    st.markdown("## Voice Recording")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        recording_controls()
+
+    # Audio playback section
+    audio_data = st.session_state.audio_data
+    if audio_data is None:
+        return
+
+    st.markdown("## Audio Playback")
+    duration = len(audio_data) / PLAN.sample_rate
+    mode = st.radio(
+        "Effect", MODULATION_MODES, index=MODULATION_MODES.index(PLAN.modulation_mode), horizontal=True,
+        format_func=lambda m: {"amplitude": "Volume follows the data", "filter": "Filter sweeps with the data"}[m]
+    )
+    modulated_audio, modulated_wav = render_modulated(audio_data, y, mode)
+    original_wav = encode_recording(audio_data)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### Original Recording")
+        st.audio(original_wav, format="audio/wav")
+        st.caption(f"Duration: {duration:.2f} seconds")
+        vis_fig = create_audio_visualization(audio_data, "Original Audio Waveform")
+        if vis_fig:
+            st.plotly_chart(vis_fig, use_container_width=True)
+
+    with col2:
+        st.markdown("### Waveform-Modulated Audio")
+        if modulated_audio is None:
+            st.error("Failed to create modulated audio.")
+            return
+        st.audio(modulated_wav, format="audio/wav")
+        st.caption(f"Duration: {duration:.2f} seconds")
+        mod_vis_fig = create_audio_visualization(modulated_audio, "Modulated Audio Waveform")
+        if mod_vis_fig:
+            st.plotly_chart(mod_vis_fig, use_container_width=True)
+
+    # Download options
+    st.markdown("### Download Audio")
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    prefix = FILE_CONFIG["filename_prefix"]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download Original",
+            data=original_wav,
+            file_name=f"{prefix}_original_{timestamp}.wav",
+            mime="audio/wav",
+            use_container_width=True
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download Modulated",
+            data=modulated_wav,
+            file_name=f"{prefix}_modulated_{timestamp}.wav",
+            mime="audio/wav",
+            use_container_width=True
+        )
+
+
+if __name__ == "__main__":
+    main()
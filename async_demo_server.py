@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+asyncio static file server for the Data Notes demo
+
+An event-loop alternative to the threaded server in run_demo_server.py,
+selected with `python run_demo_server.py --asyncio`. Every connection is a
+coroutine instead of a thread, so hundreds of idle HTTP/1.1 keep-alive
+browser connections cost almost nothing. File bodies (WAV stems, GeoJSON,
+CSV) are sent with `loop.sendfile`, which uses zero-copy os.sendfile where
+the platform supports it. Compression, ETags, 304s, byte ranges and
+caching headers behave exactly like the threaded server.
+"""
+
+import asyncio
+import email.utils
+import http
+import http.client
+import io
+import os
+import posixpath
+import time
+from urllib.parse import unquote, urlsplit
+
+from config import SERVER_CONFIG
+from run_demo_server import (
+    CustomHTTPRequestHandler, choose_encoding, file_cache_headers, guess_demo_type, not_modified, parse_range,
+)
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+]
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class AsyncDemoServer:
+    """Keep-alive HTTP/1.1 static file server running on one event loop"""
+
+    compression_cache = CustomHTTPRequestHandler.compression_cache
+    etag_cache = CustomHTTPRequestHandler.etag_cache
+    compress_types = CustomHTTPRequestHandler.compress_types
+    compress_min_bytes = CustomHTTPRequestHandler.compress_min_bytes
+
+    def __init__(self, root, max_connections=None, keepalive_timeout=None, quiet=False):
+        self.root = os.path.realpath(root)
+        self.max_connections = SERVER_CONFIG["max_connections"] if max_connections is None else max_connections
+        self.keepalive_timeout = SERVER_CONFIG["keepalive_timeout"] if keepalive_timeout is None else keepalive_timeout
+        self.quiet = quiet
+        self.connections = 0
+
+    async def start(self, host, port):
+        """Bind and start accepting connections; returns the asyncio server"""
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=MAX_HEADER_BYTES, backlog=SERVER_CONFIG["workers"] * 8)
+
+    async def handle_connection(self, reader, writer):
+        if self.connections >= self.max_connections:
+            # Over the cap: answer cheaply instead of holding the socket open
+            await self._send(writer, http.HTTPStatus.SERVICE_UNAVAILABLE, [('Retry-After', '1')], b'', False)
+            writer.close()
+            return
+
+        self.connections += 1
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass  # Client disconnected or sent a malformed request
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        """Serve one request; returns True when the connection should stay open"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keepalive_timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return False  # Idle keep-alive connection or client went away
+
+        request_line, _, header_block = head.partition(b'\r\n')
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            await self._send_error(writer, http.HTTPStatus.BAD_REQUEST, False)
+            return False
+        headers = http.client.parse_headers(io.BytesIO(header_block))
+
+        connection = (headers.get('Connection') or '').lower()
+        keep_alive = 'close' not in connection if version == 'HTTP/1.1' else 'keep-alive' in connection
+
+        # Request bodies are not used by the static server, but must be consumed to keep the stream in sync
+        length = int(headers.get('Content-Length') or 0)
+        if length:
+            await reader.readexactly(length)
+
+        if method == 'OPTIONS':
+            status = await self._send(writer, http.HTTPStatus.NO_CONTENT, [], b'', keep_alive)
+        elif method not in ('GET', 'HEAD'):
+            status = await self._send_error(writer, http.HTTPStatus.METHOD_NOT_ALLOWED, keep_alive)
+        else:
+            status = await self.serve_file(writer, target, headers, method == 'HEAD', keep_alive)
+
+        if not self.quiet:
+            print(f'{writer.get_extra_info("peername", ("-",))[0]} - [{time.strftime("%d/%b/%Y %H:%M:%S")}] '
+                  f'"{method} {target} {version}" {int(status)}')
+        return keep_alive
+
+    def translate_path(self, target):
+        """Map a request target to a file under the root, or None if it escapes the root"""
+        path = posixpath.normpath(unquote(urlsplit(target).path))
+        full = os.path.realpath(os.path.join(self.root, *[p for p in path.split('/') if p and p != '..']))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            return None
+        if os.path.isdir(full):
+            full = os.path.join(full, 'index.html')
+        return full
+
+    async def serve_file(self, writer, target, headers, head_only, keep_alive):
+        path = self.translate_path(target)
+        if path is None or not os.path.isfile(path):
+            return await self._send_error(writer, http.HTTPStatus.NOT_FOUND, keep_alive)
+
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return await self._send_error(writer, http.HTTPStatus.NOT_FOUND, keep_alive)
+
+        with f:
+            stat = os.fstat(f.fileno())
+            content_type = guess_demo_type(path)
+            compressible = content_type in self.compress_types and stat.st_size >= self.compress_min_bytes
+            range_header = headers.get('Range')
+
+            encoding = None
+            if compressible and not range_header:
+                encoding = choose_encoding(headers.get('Accept-Encoding'))
+
+            # Hashing a new file version reads it once; keep that off the event loop
+            loop = asyncio.get_running_loop()
+            tag = await loop.run_in_executor(None, self.etag_cache.get, path, stat)
+            etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+            cache_headers = file_cache_headers(path, etag, stat, compressible)
+
+            if not_modified(headers, etag, stat):
+                return await self._send(writer, http.HTTPStatus.NOT_MODIFIED, cache_headers, b'', keep_alive)
+
+            if encoding:
+                data = await loop.run_in_executor(None, self.compression_cache.get, path, stat, encoding)
+                response_headers = [('Content-Type', content_type), ('Content-Encoding', encoding)] + cache_headers
+                return await self._send(writer, http.HTTPStatus.OK, response_headers,
+                                        b'' if head_only else data, keep_alive, len(data))
+
+            if_range = headers.get('If-Range')
+            byte_range = parse_range(range_header, stat.st_size) if not if_range or if_range == etag else None
+            if byte_range is False:
+                return await self._send(writer, http.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                                        [('Content-Range', f'bytes */{stat.st_size}')], b'', keep_alive)
+
+            status, offset, count = http.HTTPStatus.OK, 0, stat.st_size
+            response_headers = [('Content-Type', content_type)] + cache_headers
+            if byte_range:
+                start, end = byte_range
+                status, offset, count = http.HTTPStatus.PARTIAL_CONTENT, start, end - start + 1
+                response_headers.append(('Content-Range', f'bytes {start}-{end}/{stat.st_size}'))
+
+            await self._send(writer, status, response_headers, b'', keep_alive, count)
+            if not head_only and count:
+                await loop.sendfile(writer.transport, f, offset, count)
+            return status
+
+    async def _send(self, writer, status, headers, body, keep_alive, content_length=None):
+        """Write a response head (and small body); returns the status for logging"""
+        lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Date: {email.utils.formatdate(usegmt=True)}']
+        if status not in (http.HTTPStatus.NO_CONTENT, http.HTTPStatus.NOT_MODIFIED):
+            lines.append(f'Content-Length: {len(body) if content_length is None else content_length}')
+        lines += [f'{name}: {value}' for name, value in headers + CORS_HEADERS]
+        if keep_alive:
+            lines += ['Connection: keep-alive', f'Keep-Alive: timeout={int(self.keepalive_timeout)}']
+        else:
+            lines.append('Connection: close')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+        return status
+
+    async def _send_error(self, writer, status, keep_alive):
+        body = f'{status.value} {status.phrase}\n'.encode()
+        return await self._send(writer, status, [('Content-Type', 'text/plain; charset=utf-8')], body, keep_alive)
+
+
+def run_async_server(port, root, max_connections=None, quiet=False, on_ready=None):
+    """Serve `root` on `port` until interrupted; `on_ready` is called once the socket is bound"""
+    async def main():
+        server = AsyncDemoServer(root, max_connections, quiet=quiet)
+        listener = await server.start("", port)
+        if on_ready:
+            on_ready()
+        async with listener:
+            await listener.serve_forever()
+
+    asyncio.run(main())
@@ -1,13 +1,10 @@
 import streamlit as st
 import numpy as np
-import soundfile as sf
 import tempfile
-import os
 from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
-import av
-import threading
-import queue
-import time
+
+from config import AUDIO_CONFIG
+from loudness import normalize_loudness
 
 class AudioRecorder:
     def __init__(self):
@@ -121,8 +118,11 @@ def save_audio_file(audio_data, sample_rate, filename_prefix):
     if audio_data is None or len(audio_data) == 0:
         return None
     
-    # Normalize audio data
-    audio_data = audio_data / np.max(np.abs(audio_data)) * 0.95
+    import soundfile as sf
+    
+    # Normalize to the output loudness; the gain is applied once, in place on a float copy
+    audio_data = np.array(audio_data, dtype=np.float32)
+    normalize_loudness(audio_data, sample_rate, AUDIO_CONFIG["output_loudness"], AUDIO_CONFIG["clip_ceiling"])
     
     # Create temporary file
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
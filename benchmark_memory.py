@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for the Data Notes audio pipeline
+
+Runs each processing stage of app_unified.py (capture, normalize, resample,
+modulate, spatialize, encode) at several audio durations and records the peak traced
+allocation (tracemalloc) and the RSS delta for every stage. Results are
+reported in bytes per second of audio and checked against the budgets in
+BENCHMARK_CONFIG.
+"""
+
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from config import AUDIO_CONFIG, BENCHMARK_CONFIG, DATA_CONFIG
+
+
+def _current_rss_bytes():
+    """Return the resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Fall back to the high-water mark where /proc is unavailable
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def make_capture_frames(duration, sample_rate, frame_size):
+    """Build the list of frames a WebRTC capture of `duration` seconds produces"""
+    total = int(duration * sample_rate)
+    rng = np.random.default_rng(0)
+    frames = []
+    for start in range(0, total, frame_size):
+        size = min(frame_size, total - start)
+        frames.append((rng.standard_normal(size) * 3000).astype(np.int16).reshape(1, -1))
+    return frames
+
+
+def make_waveform_data():
+    """Generate the graph data the apps use as a modulation envelope"""
+    x = np.linspace(0, DATA_CONFIG["time_range"], DATA_CONFIG["num_points"])
+    y = sum(np.sin(f * x) * a for f, a in zip(DATA_CONFIG["frequencies"], DATA_CONFIG["amplitudes"]))
+    return y
+
+
+# Pipeline stages, mirroring the code paths of app_unified.py (engine_plan)
+
+def stage_capture(frames):
+    """Concatenate recorded frames and collapse to mono (AudioRecorder.stop_recording)"""
+    audio_data = np.concatenate(frames, axis=1).astype(np.float64)
+    if audio_data.ndim > 1:
+        audio_data = np.mean(audio_data, axis=0)
+    return audio_data
+
+
+def stage_normalize(audio_data, plan):
+    """Convert to the plan's format and normalize loudness (engine_plan.prepare_recording)"""
+    from engine_plan import prepare_recording
+    return prepare_recording(audio_data, plan)
+
+
+def stage_resample(audio_data, waveform_data, plan):
+    """Stretch the graph data to the audio length (engine_plan.resample_envelope)"""
+    from engine_plan import resample_envelope
+    return resample_envelope(waveform_data, len(audio_data), plan)
+
+
+def stage_modulate(audio_data, waveform_data, plan):
+    """Apply the envelope or filter sweep, then loudness and limiting (engine_plan.modulate/finish_output)"""
+    from engine_plan import modulate
+    return modulate(audio_data, waveform_data, plan)
+
+
+def stage_spatialize(audio_data, waveform_data, plan):
+    """Pan the result across the output channels with the graph data (engine_plan.spatialize)"""
+    from engine_plan import spatialize
+    return spatialize(audio_data, waveform_data, plan)
+
+
+def stage_encode(audio_data, sample_rate):
+    """Encode the result as a WAV file in memory (save_audio_to_bytes)"""
+    import soundfile as sf
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, sample_rate, format='wav')
+    return buffer.getvalue()
+
+
+def measure_stage(func, *args):
+    """Run one stage and return (result, peak traced bytes, RSS delta bytes, seconds)"""
+    gc.collect()
+    rss_before = _current_rss_bytes()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_delta = _current_rss_bytes() - rss_before
+    return result, peak, rss_delta, elapsed
+
+
+def profile_duration(duration, sample_rate, frame_size):
+    """Profile every pipeline stage for one audio duration"""
+    import dataclasses
+    from engine_plan import get_plan
+
+    plan = get_plan()
+    if sample_rate != plan.sample_rate:
+        plan = dataclasses.replace(plan, sample_rate=sample_rate)
+    # Long benchmark durations must not be cut to the apps' recording limit
+    plan = dataclasses.replace(plan, max_samples=max(plan.max_samples, int(duration * sample_rate)))
+    frames = make_capture_frames(duration, sample_rate, frame_size)
+    waveform_data = make_waveform_data()
+    results = []
+
+    audio_data, peak, rss, elapsed = measure_stage(stage_capture, frames)
+    results.append(("capture", peak, rss, elapsed))
+    del frames
+
+    audio_data, peak, rss, elapsed = measure_stage(stage_normalize, audio_data, plan)
+    results.append(("normalize", peak, rss, elapsed))
+
+    envelope, peak, rss, elapsed = measure_stage(stage_resample, audio_data, waveform_data, plan)
+    results.append(("resample", peak, rss, elapsed))
+    del envelope
+
+    modulated_audio, peak, rss, elapsed = measure_stage(stage_modulate, audio_data, waveform_data, plan)
+    results.append(("modulate", peak, rss, elapsed))
+
+    modulated_audio, peak, rss, elapsed = measure_stage(stage_spatialize, modulated_audio, waveform_data, plan)
+    results.append(("spatialize", peak, rss, elapsed))
+
+    try:
+        _, peak, rss, elapsed = measure_stage(stage_encode, modulated_audio, sample_rate)
+        results.append(("encode", peak, rss, elapsed))
+    except ImportError:
+        print("⚠️  soundfile not installed, skipping encode stage")
+
+    return results
+
+
+def warm_up(sample_rate, frame_size):
+    """Run the pipeline once on a short clip so imports and caches are not counted"""
+    profile_duration(0.1, sample_rate, frame_size)
+
+
+def run_benchmark(durations, sample_rate, frame_size, budgets):
+    """Profile all durations, print a report and return the list of budget violations"""
+    violations = []
+    warm_up(sample_rate, frame_size)
+
+    print(f"{'duration':>9} {'stage':<10} {'peak traced':>13} {'RSS delta':>12} {'bytes/s audio':>14} {'budget':>12} {'time':>9}")
+    print("-" * 86)
+    for duration in durations:
+        for stage, peak, rss, elapsed in profile_duration(duration, sample_rate, frame_size):
+            per_second = peak / duration
+            budget = budgets.get(stage)
+            status = ""
+            if budget is not None and per_second > budget:
+                status = " ❌"
+                violations.append((duration, stage, per_second, budget))
+            budget_text = f"{budget:,}" if budget is not None else "-"
+            print(f"{duration:>8}s {stage:<10} {peak / 1e6:>10.2f} MB {rss / 1e6:>9.2f} MB "
+                  f"{per_second:>14,.0f} {budget_text:>12} {elapsed * 1000:>7.1f}ms{status}")
+    return violations
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Profile peak memory per audio pipeline stage")
+    parser.add_argument("--durations", type=float, nargs="+", default=BENCHMARK_CONFIG["durations"],
+                        help="audio durations in seconds")
+    parser.add_argument("--sample-rate", type=int, default=AUDIO_CONFIG["sample_rate"])
+    parser.add_argument("--budget", action="append", default=[], metavar="STAGE=BYTES",
+                        help="override a stage budget in bytes per second of audio")
+    args = parser.parse_args()
+
+    budgets = dict(BENCHMARK_CONFIG["memory_budgets"])
+    for override in args.budget:
+        stage, _, value = override.partition("=")
+        budgets[stage] = int(value)
+
+    print("🧠 Data Notes Memory Benchmark")
+    print("=" * 40)
+    violations = run_benchmark(args.durations, args.sample_rate, BENCHMARK_CONFIG["frame_size"], budgets)
+
+    if violations:
+        print(f"\n❌ {len(violations)} stage(s) exceeded their memory budget:")
+        for duration, stage, per_second, budget in violations:
+            print(f"   - {stage} at {duration}s: {per_second:,.0f} B/s > {budget:,} B/s")
+        sys.exit(1)
+    print("\n✅ All stages within memory budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the Data Notes apps
+
+Imports each app module in a fresh interpreter with `python -X importtime`,
+parses the report, and prints where the cold-start time goes. The run fails
+when a module exceeds its import-time budget or eagerly loads a package
+that should only be imported on first use.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from config import BENCHMARK_CONFIG
+
+
+def parse_importtime(stderr_text):
+    """Parse `-X importtime` output into (package, self_us, cumulative_us, depth) tuples"""
+    entries = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+        name_field = fields[2]
+        stripped = name_field.lstrip()
+        depth = (len(name_field) - len(stripped) - 1) // 2
+        entries.append((stripped, int(fields[0]), int(fields[1]), depth))
+    return entries
+
+
+def measure_import(module, cwd):
+    """Import `module` in a fresh interpreter and return (entries, wall seconds, error text)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"
+    return parse_importtime(result.stderr), elapsed, error
+
+
+def summarize(entries):
+    """Return total import time and self time grouped by top-level package"""
+    total_us = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+    by_package = {}
+    for name, self_us, _, _ in entries:
+        root = name.split(".")[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    return total_us, sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+
+
+def check_module(module, cwd, budget_ms, lazy_imports, top):
+    """Report the import profile of one module and return its list of problems"""
+    entries, elapsed, error = measure_import(module, cwd)
+    print(f"\n📦 {module}")
+    if error:
+        print(f"   ❌ {error}")
+        return [f"{module}: {error}"]
+
+    total_us, by_package = summarize(entries)
+    print(f"   Import time: {total_us / 1000:.1f} ms (interpreter wall time {elapsed * 1000:.0f} ms)")
+    print(f"   Top {top} packages by self time:")
+    for name, self_us in by_package[:top]:
+        print(f"      {name:<28} {self_us / 1000:>8.1f} ms")
+
+    problems = []
+    if total_us / 1000 > budget_ms:
+        problems.append(f"{module}: import took {total_us / 1000:.1f} ms > budget {budget_ms} ms")
+
+    imported = {name for name, _, _, _ in entries}
+    for lazy in lazy_imports:
+        if lazy in imported:
+            problems.append(f"{module}: eagerly imports '{lazy}'")
+    return problems
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Measure cold import time of the Data Notes apps")
+    parser.add_argument("modules", nargs="*", default=BENCHMARK_CONFIG["startup_modules"])
+    parser.add_argument("--budget-ms", type=float, default=BENCHMARK_CONFIG["startup_budget_ms"])
+    parser.add_argument("--top", type=int, default=10, help="number of packages to list")
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent.absolute()
+
+    print("⏱️  Data Notes Startup Benchmark")
+    print("=" * 40)
+    problems = []
+    for module in args.modules:
+        problems.extend(check_module(module, script_dir, args.budget_ms,
+                                     BENCHMARK_CONFIG["lazy_imports"], args.top))
+
+    if problems:
+        print(f"\n❌ {len(problems)} startup problem(s):")
+        for problem in problems:
+            print(f"   - {problem}")
+        sys.exit(1)
+    print("\n✅ All modules within startup budget")
+
+
+if __name__ == "__main__":
+    main()
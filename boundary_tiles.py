@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Cut the ZIP boundary layer into static multi-zoom tiles for the SNAP map
+
+For every zoom level in GEO_CONFIG["tile_zooms"], each ZIP polygon is
+simplified for that zoom and written into every Web Mercator z/x/y tile it
+touches, with the per-ZIP SNAP aggregates embedded as feature properties.
+
+Below GEO_CONFIG["tile_clip_zoom"] whole polygons are written, and the map
+draws each ZIP once. From that zoom up, a tile only holds the part of each
+polygon inside the tile, so a large ZIP is no longer repeated in full
+across dozens of tiles. Fills are clipped exactly to the tile, so pieces
+of one ZIP meet edge to edge without overlapping. A cut piece also carries
+its outline as lines: the boundary clipped to the tile plus a small buffer
+(GEO_CONFIG["tile_buffer"]) without the edges along the cut, so strokes
+run on across tile edges while the cuts themselves stay unstroked.
+
+An index.json next to the tiles lists the zoom range and which tiles exist,
+so the client never requests empty tiles.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+
+from boundary_topology import load_features
+from config import GEO_CONFIG, SNAP_CONFIG, project_path
+from filter_geojson import OUTPUT_FILE, optimize_geometry, zoom_tolerance
+
+TILE_PROPERTIES = ("ZIPCODE",)  # Boundary properties copied into tile features
+AGGREGATE_PROPERTIES = ("totalStores", "storeTypes", "instruments", "color", "opacity")
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """Return the Web Mercator tile x/y containing each lon/lat at `zoom`"""
+    n = 2 ** zoom
+    lat = np.clip(np.radians(np.asarray(lat, dtype=np.float64)), -1.4844, 1.4844)  # ±85.05°
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n
+    return np.clip(x.astype(np.int64), 0, n - 1), np.clip(y.astype(np.int64), 0, n - 1)
+
+
+def polygon_tiles(polygons, zoom):
+    """Return the set of (x, y) tiles touched by the bounding box of each polygon part"""
+    tiles = set()
+    for rings in polygons:
+        exterior = rings[0]
+        (min_lon, min_lat), (max_lon, max_lat) = exterior.min(axis=0), exterior.max(axis=0)
+        x0, y0 = lonlat_to_tile(min_lon, max_lat, zoom)  # North-west corner
+        x1, y1 = lonlat_to_tile(max_lon, min_lat, zoom)  # South-east corner
+        tiles.update((x, y) for x in range(int(x0), int(x1) + 1) for y in range(int(y0), int(y1) + 1))
+    return tiles
+
+
+def tile_bounds(x, y, zoom, buffer=0.0):
+    """Return the (west, south, east, north) degrees of tile x/y, grown by `buffer` tiles on every side"""
+    n = 2 ** zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * row / n))))
+
+    return ((x - buffer) / n * 360.0 - 180.0, latitude(y + 1 + buffer),
+            (x + 1 + buffer) / n * 360.0 - 180.0, latitude(y - buffer))
+
+
+def tile_box(x, y, zoom, precision, leaflet_order, buffer=0.0):
+    """Return the (low, high) corners of a tile as arrays in the tiles' coordinate order, rounded to `precision`"""
+    west, south, east, north = (round(value, precision) for value in tile_bounds(x, y, zoom, buffer))
+    low, high = ((south, west), (north, east)) if leaflet_order else ((west, south), (east, north))
+    return np.array(low), np.array(high)
+
+
+def clip_ring(ring, low, high):
+    """Clip a closed ring to the box low..high (per axis) with Sutherland-Hodgman; None if nothing is left
+
+    Each box side is one vectorized pass: every vertex inside the side is
+    kept, and every edge crossing it adds its intersection point, placed
+    exactly on the side so cut edges can be recognized later.
+    """
+    points = ring[:-1]
+    for axis, bound, below in ((0, low[0], False), (0, high[0], True), (1, low[1], False), (1, high[1], True)):
+        if not len(points):
+            return None
+        following = np.roll(points, -1, axis=0)
+        inside = points[:, axis] <= bound if below else points[:, axis] >= bound
+        crossing = inside != np.roll(inside, -1)
+        start, end = points[crossing], following[crossing]
+        crossings = start + ((bound - start[:, axis]) / (end[:, axis] - start[:, axis]))[:, None] * (end - start)
+        crossings[:, axis] = bound
+
+        # Vertex i (if inside) is followed by the crossing on edge i (if any)
+        slots = np.empty((len(points), 2, 2))
+        slots[:, 0] = points
+        slots[crossing, 1] = crossings
+        points = slots[np.column_stack((inside, crossing))]
+
+    if len(points):
+        points = points[np.concatenate(([True], np.any(np.diff(points, axis=0) != 0, axis=1)))]
+    if len(points) < 3:
+        return None
+    return np.vstack((points, points[:1]))
+
+
+def clip_polygons(polygons, low, high):
+    """Clip (Multi)Polygon parts to a box; parts wholly inside are kept as they are"""
+    clipped = []
+    for rings in polygons:
+        exterior = rings[0]
+        if np.all(exterior.min(axis=0) >= low) and np.all(exterior.max(axis=0) <= high):
+            clipped.append(rings)
+            continue
+        if np.any(exterior.max(axis=0) < low) or np.any(exterior.min(axis=0) > high):
+            continue
+        part = [clip_ring(ring, low, high) for ring in rings]
+        if part[0] is not None:
+            clipped.append([part[0]] + [ring for ring in part[1:] if ring is not None])
+    return clipped
+
+
+def outline_lines(ring, low, high):
+    """Split a ring clipped to the box low..high into polylines, leaving out the edges that lie along the box"""
+    starts, ends = ring[:-1], ring[1:]
+    cut = np.zeros(len(starts), dtype=bool)
+    for axis in (0, 1):
+        on_side = (starts[:, axis] == low[axis]) | (starts[:, axis] == high[axis])
+        cut |= on_side & (starts[:, axis] == ends[:, axis])
+    if not cut.any():
+        return [ring]
+
+    # Start right after a cut edge, so no line wraps around the end of the ring
+    order = (np.arange(len(cut)) + np.flatnonzero(cut)[0] + 1) % len(cut)
+    starts, ends, kept = starts[order], ends[order], ~cut[order]
+    bounds = np.flatnonzero(np.diff(np.concatenate(([0], kept.view(np.int8), [0]))))
+    return [np.vstack((starts[first:last], ends[last - 1:last])) for first, last in zip(bounds[::2], bounds[1::2])]
+
+
+def tile_precision(zoom):
+    """Decimal places needed to keep quantization below the simplification tolerance"""
+    return min(GEO_CONFIG["coordinate_precision"], max(1, math.ceil(-math.log10(zoom_tolerance(zoom))) + 1))
+
+
+def load_aggregates(aggregates_path=None):
+    """Load the per-ZIP SNAP aggregates written by build_snap_data.py ({} if missing)"""
+    aggregates_path = project_path(SNAP_CONFIG["aggregates_path"]) if aggregates_path is None else aggregates_path
+    if not os.path.exists(aggregates_path):
+        print(f"⚠️  SNAP aggregates not found, tiles will carry boundaries only: {aggregates_path}")
+        return {}
+    with open(aggregates_path, 'r', encoding='utf-8') as f:
+        return json.load(f)["zips"]
+
+
+def tile_properties(properties, aggregates, zip_property="ZIPCODE"):
+    """Return the boundary properties to keep plus the ZIP's SNAP aggregates"""
+    kept = {name: properties[name] for name in TILE_PROPERTIES if name in properties}
+    zip_data = aggregates.get(str(properties.get(zip_property) or '').strip(), {})
+    kept.update({name: zip_data[name] for name in AGGREGATE_PROPERTIES if name in zip_data})
+    return kept
+
+
+def build_tiles(source_file=None, output_dir=None, zooms=None, aggregates_path=None, leaflet_order=None):
+    """Write z/x/y boundary tiles and their index; returns the index dict"""
+    source_file = project_path(OUTPUT_FILE) if source_file is None else source_file
+    output_dir = project_path(GEO_CONFIG["tiles_dir"]) if output_dir is None else output_dir
+    min_zoom, max_zoom = GEO_CONFIG["tile_zooms"] if zooms is None else zooms
+    leaflet_order = GEO_CONFIG["leaflet_order"] if leaflet_order is None else leaflet_order
+    clip_zoom = GEO_CONFIG["tile_clip_zoom"]
+    buffer = GEO_CONFIG["tile_buffer"] / 256.0  # Pixels to tiles
+
+    features = load_features(source_file)
+    aggregates = load_aggregates(aggregates_path)
+    properties = [tile_properties(props, aggregates) for props, _ in features]
+
+    # Only zoom folders are replaced, so unrelated files in the directory survive
+    for zoom in range(min_zoom, max_zoom + 1):
+        shutil.rmtree(os.path.join(output_dir, str(zoom)), ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    index = {
+        "minZoom": min_zoom,
+        "maxZoom": max_zoom,
+        "coordinateOrder": "latlng" if leaflet_order else "lnglat",
+        "tiles": {},
+    }
+    for zoom in range(min_zoom, max_zoom + 1):
+        start = time.perf_counter()
+        tolerance, precision = zoom_tolerance(zoom), tile_precision(zoom)
+        clip = zoom >= clip_zoom
+        tiles = {}
+        for (_, polygons), props in zip(features, properties):
+            if not polygons:
+                continue
+            geometry = {"type": "MultiPolygon", "coordinates": [[ring.tolist() for ring in rings] for rings in polygons]}
+            geometry, _, _, _ = optimize_geometry(geometry, tolerance, precision, leaflet_order)
+            if geometry is None:
+                continue
+            if not clip:
+                encoded = json.dumps({"type": "Feature", "properties": props, "geometry": geometry},
+                                     separators=(',', ':'))
+                for tile in polygon_tiles(polygons, zoom):
+                    tiles.setdefault(tile, []).append(encoded)
+                continue
+
+            # Clip the simplified outline, so neighbouring pieces share their vertices
+            parts = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+            parts = [[np.asarray(ring, dtype=np.float64) for ring in rings] for rings in parts]
+            exteriors = np.vstack([rings[0] for rings in parts])
+            label = np.round((exteriors.min(axis=0) + exteriors.max(axis=0)) / 2, precision).tolist()
+            whole = {id(rings[0]) for rings in parts}  # clip_polygons passes uncut parts through as they are
+            for x, y in polygon_tiles(polygons, zoom):
+                low, high = tile_box(x, y, zoom, precision, leaflet_order)
+                pieces = clip_polygons(parts, low, high)
+                if not pieces:
+                    continue
+                piece_props = dict(props, labelPoint=label)
+                if any(id(rings[0]) not in whole for rings in pieces):  # Some part was cut
+                    low, high = tile_box(x, y, zoom, precision, leaflet_order, buffer)
+                    piece_props["outline"] = [np.round(line, precision).tolist()
+                                              for rings in clip_polygons(parts, low, high) for ring in rings
+                                              for line in outline_lines(ring, low, high)]
+                piece = {"type": "MultiPolygon",
+                         "coordinates": [[np.round(ring, precision).tolist() for ring in rings] for rings in pieces]}
+                encoded = json.dumps({"type": "Feature", "properties": piece_props, "geometry": piece},
+                                     separators=(',', ':'))
+                tiles.setdefault((x, y), []).append(encoded)
+
+        total_bytes = 0
+        for (x, y), encoded_features in tiles.items():
+            tile_dir = os.path.join(output_dir, str(zoom), str(x))
+            os.makedirs(tile_dir, exist_ok=True)
+            content = '{"type":"FeatureCollection","features":[' + ','.join(encoded_features) + ']}'
+            with open(os.path.join(tile_dir, f"{y}.geojson"), 'w', encoding='utf-8') as f:
+                f.write(content)
+            total_bytes += len(content)
+
+        index["tiles"][str(zoom)] = sorted(f"{x}/{y}" for x, y in tiles)
+        largest = max((len(v) for v in tiles.values()), default=0)
+        print(f"   z{zoom}: {len(tiles)} tiles, {total_bytes / 1024:.0f} KB total, "
+              f"up to {largest} ZIPs per tile ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    with open(os.path.join(output_dir, "index.json"), 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    return index
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Cut ZIP boundaries into static multi-zoom map tiles")
+    parser.add_argument("--input", default=None, help=f"boundary GeoJSON file (default: {OUTPUT_FILE})")
+    parser.add_argument("--output", default=None,
+                        help=f"tile directory to write (default: {GEO_CONFIG['tiles_dir']})")
+    parser.add_argument("--zooms", type=int, nargs=2, default=GEO_CONFIG["tile_zooms"], metavar=("MIN", "MAX"),
+                        help="inclusive zoom range")
+    args = parser.parse_args()
+
+    print("🧱 SNAP Boundary Tile Builder")
+    print("=" * 40)
+
+    args.input = args.input or project_path(OUTPUT_FILE)
+    args.output = args.output or project_path(GEO_CONFIG["tiles_dir"])
+    if not os.path.exists(args.input):
+        print(f"❌ Error: Boundary file not found: {args.input}")
+        print("💡 Run filter_geojson.py first to create the King County boundary file.")
+        return
+
+    index = build_tiles(args.input, args.output, tuple(args.zooms))
+    total = sum(len(tiles) for tiles in index["tiles"].values())
+    print(f"✅ Wrote {total} tiles to {args.output}/ (index: {os.path.join(args.output, 'index.json')})")
+
+
+if __name__ == "__main__":
+    main()
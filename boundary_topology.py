@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Encode ZIP boundaries as a TopoJSON topology with shared arcs
+
+Neighbouring ZIP polygons share their borders, so plain GeoJSON stores every
+border twice. The encoder quantizes all coordinates to an integer grid, finds
+junctions (vertices where the set of neighbouring vertices changes between
+rings), cuts every ring into arcs at the junctions and stores each distinct
+arc once, delta-encoded. Rings reference arcs by index, with ~index for an
+arc walked backwards. A small reference decoder turns the topology back into
+GeoJSON and is used for the round-trip check.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from config import GEO_CONFIG, project_path
+from filter_geojson import OUTPUT_FILE, iter_geojson_features, simplify_line, simplify_ring, zoom_tolerance
+
+OBJECT_NAME = "zips"  # Name of the geometry collection inside the topology
+
+
+def _feature_polygons(geometry, latlng_order=False):
+    """Return a geometry as a list of polygons, each a list of (N, 2) lng/lat ring arrays"""
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry.get('type') == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return []
+
+    result = []
+    for polygon in polygons:
+        rings = []
+        for ring in polygon:
+            if len(ring) < 3:
+                continue
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            rings.append(ring[:, ::-1] if latlng_order else ring)
+        if rings:
+            result.append(rings)
+    return result
+
+
+def load_features(geojson_path):
+    """Read the features of a GeoJSON file as (properties, polygons) pairs"""
+    header = {}
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        features = list(iter_geojson_features(f, header))
+    # Files written by filter_geojson.py --simplify may already be in Leaflet order
+    latlng_order = header.get('coordinateOrder') == 'latlng'
+    return [(feature.get('properties') or {}, _feature_polygons(feature.get('geometry'), latlng_order))
+            for feature in features]
+
+
+def quantize_ring(ring, translate, scale):
+    """Snap a ring to the integer grid, dropping repeated vertices; None if it collapses"""
+    quantized = np.round((ring - translate) / scale).astype(np.int64)
+    distinct = np.concatenate(([True], np.any(np.diff(quantized, axis=0) != 0, axis=1)))
+    quantized = quantized[distinct]
+    if not np.array_equal(quantized[0], quantized[-1]):
+        quantized = np.vstack((quantized, quantized[:1]))
+    return quantized if len(quantized) >= 4 else None
+
+
+def _point_keys(points, quantization):
+    """Pack integer grid points into single int64 keys"""
+    return points[:, 0] * (quantization + 1) + points[:, 1]
+
+
+def find_junctions(rings, quantization):
+    """Return the keys of vertices whose neighbours differ between occurrences"""
+    if not rings:
+        return np.empty(0, dtype=np.int64)
+    keys, lows, highs = [], [], []
+    for ring in rings:
+        key = _point_keys(ring[:-1], quantization)
+        previous, following = np.roll(key, 1), np.roll(key, -1)
+        keys.append(key)
+        lows.append(np.minimum(previous, following))
+        highs.append(np.maximum(previous, following))
+
+    neighbourhoods = np.unique(np.column_stack((np.concatenate(keys), np.concatenate(lows),
+                                                np.concatenate(highs))), axis=0)
+    points, counts = np.unique(neighbourhoods[:, 0], return_counts=True)
+    return points[counts > 1]
+
+
+def cut_ring(ring, junctions, quantization):
+    """Split a closed ring at junctions; returns (arcs, closed) where closed means no junction was hit"""
+    points = ring[:-1]
+    cuts = np.flatnonzero(np.isin(_point_keys(points, quantization), junctions))
+    if len(cuts) == 0:
+        return [ring], True
+
+    # Start at the first junction so every arc runs junction to junction
+    points = np.roll(points, -cuts[0], axis=0)
+    cuts = np.append(cuts - cuts[0], len(points))
+    points = np.vstack((points, points[:1]))
+    return [points[start:stop + 1] for start, stop in zip(cuts[:-1], cuts[1:])], False
+
+
+def _rotate_to_min(ring):
+    """Rotate a closed ring to start at its lowest vertex so equal rings compare equal"""
+    points = ring[:-1]
+    start = np.lexsort((points[:, 1], points[:, 0]))[0]
+    points = np.roll(points, -start, axis=0)
+    return np.vstack((points, points[:1]))
+
+
+class ArcTable:
+    """Distinct arcs, looked up in either direction"""
+
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+
+    def add(self, arc, closed=False):
+        """Return the index of `arc`, or ~index if it is stored reversed"""
+        if closed:
+            arc = _rotate_to_min(arc)
+            reverse = _rotate_to_min(arc[::-1])
+        else:
+            reverse = arc[::-1]
+
+        key = arc.tobytes()
+        if key in self._index:
+            return self._index[key]
+        reverse_key = reverse.tobytes()
+        if reverse_key in self._index:
+            return ~self._index[reverse_key]
+
+        self._index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+
+def simplify_arc(arc, tolerance):
+    """Douglas-Peucker simplify one arc in grid units, keeping its end points fixed"""
+    if tolerance <= 0 or len(arc) < 3:
+        return arc
+    if np.array_equal(arc[0], arc[-1]):
+        simplified, _ = simplify_ring(arc, tolerance, 0)
+        return arc if simplified is None else simplified.astype(np.int64)
+    keep, _ = simplify_line(arc.astype(np.float64), tolerance)
+    return arc[keep]
+
+
+def encode_topology(features, quantization=None, tolerance=0.0):
+    """Build a TopoJSON topology from (properties, polygons) pairs
+
+    `tolerance` is a Douglas-Peucker tolerance in degrees applied to each
+    shared arc, so neighbouring polygons stay seamless after simplification.
+    """
+    quantization = GEO_CONFIG["topology_quantization"] if quantization is None else quantization
+
+    all_points = [ring for _, polygons in features for polygon in polygons for ring in polygon]
+    if all_points:
+        stacked = np.vstack(all_points)
+        low, high = stacked.min(axis=0), stacked.max(axis=0)
+    else:
+        low, high = np.zeros(2), np.ones(2)
+    translate = low
+    scale = np.where(high > low, (high - low) / (quantization - 1), 1.0)
+
+    quantized = []
+    for properties, polygons in features:
+        parts = []
+        for polygon in polygons:
+            rings = [quantize_ring(ring, translate, scale) for ring in polygon]
+            if rings[0] is None:
+                continue  # Exterior collapsed on the grid, drop the whole part
+            parts.append([ring for ring in rings if ring is not None])
+        quantized.append((properties, parts))
+
+    junctions = find_junctions([ring for _, parts in quantized for polygon in parts for ring in polygon],
+                               quantization)
+
+    table = ArcTable()
+    geometries = []
+    for properties, parts in quantized:
+        polygons = []
+        for polygon in parts:
+            ring_arcs = []
+            for ring in polygon:
+                arcs, closed = cut_ring(ring, junctions, quantization)
+                ring_arcs.append([table.add(arc, closed) for arc in arcs])
+            polygons.append(ring_arcs)
+
+        geometry = {"properties": properties}
+        if not polygons:
+            geometry["type"] = None
+        elif len(polygons) == 1:
+            geometry["type"] = "Polygon"
+            geometry["arcs"] = polygons[0]
+        else:
+            geometry["type"] = "MultiPolygon"
+            geometry["arcs"] = polygons
+        geometries.append(geometry)
+
+    grid_tolerance = tolerance / float(scale.max())
+    arcs = []
+    for arc in table.arcs:
+        arc = simplify_arc(arc, grid_tolerance)
+        # First point absolute, the rest as offsets from the previous point
+        arcs.append(np.vstack((arc[:1], np.diff(arc, axis=0))).tolist())
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": arcs,
+    }
+
+
+def decode_arcs(topology, quantized=False):
+    """Undo the delta encoding; returns grid points, or lng/lat when `quantized` is False"""
+    decoded = []
+    transform = topology.get("transform")
+    for arc in topology["arcs"]:
+        points = np.cumsum(np.asarray(arc, dtype=np.int64).reshape(-1, 2), axis=0)
+        if not quantized and transform:
+            points = points * np.asarray(transform["scale"]) + np.asarray(transform["translate"])
+        decoded.append(points)
+    return decoded
+
+
+def stitch_ring(arc_indexes, arcs):
+    """Join the arcs of one ring, dropping the point shared by consecutive arcs"""
+    pieces = []
+    for i, index in enumerate(arc_indexes):
+        arc = arcs[~index][::-1] if index < 0 else arcs[index]
+        pieces.append(arc if i == 0 else arc[1:])
+    return np.vstack(pieces)
+
+
+def decode_topology(topology, object_name=OBJECT_NAME, quantized=False):
+    """Reference decoder: turn a topology object back into a GeoJSON FeatureCollection"""
+    arcs = decode_arcs(topology, quantized)
+    features = []
+    for geometry in topology["objects"][object_name]["geometries"]:
+        decoded = None
+        if geometry.get("type") == "Polygon":
+            decoded = {"type": "Polygon",
+                       "coordinates": [stitch_ring(ring, arcs).tolist() for ring in geometry["arcs"]]}
+        elif geometry.get("type") == "MultiPolygon":
+            decoded = {"type": "MultiPolygon",
+                       "coordinates": [[stitch_ring(ring, arcs).tolist() for ring in polygon]
+                                       for polygon in geometry["arcs"]]}
+        features.append({"type": "Feature", "properties": geometry.get("properties", {}), "geometry": decoded})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _same_ring(expected, actual):
+    """Compare two closed grid rings as cycles (the decoded ring may start elsewhere)"""
+    expected, actual = expected[:-1], actual[:-1]
+    if expected.shape != actual.shape:
+        return False
+    starts = np.flatnonzero(np.all(actual == expected[0], axis=1))
+    return any(np.array_equal(np.roll(actual, -start, axis=0), expected) for start in starts)
+
+
+def verify_round_trip(features, topology):
+    """Check that decoding reproduces every quantized input ring exactly
+
+    Only meaningful for topologies encoded without simplification. Returns
+    (ok, number of rings checked, max coordinate error in degrees).
+    """
+    transform = topology["transform"]
+    translate = np.asarray(transform["translate"])
+    scale = np.asarray(transform["scale"])
+    decoded = decode_topology(topology, quantized=True)["features"]
+    if len(decoded) != len(features):
+        return False, 0, float('inf')
+
+    checked, max_error = 0, 0.0
+    for (_, polygons), feature in zip(features, decoded):
+        expected = []
+        for polygon in polygons:
+            rings = [quantize_ring(ring, translate, scale) for ring in polygon]
+            if rings[0] is not None:
+                expected.append([ring for ring in rings if ring is not None])
+        geometry = feature["geometry"]
+        if geometry is None:
+            actual = []
+        elif geometry["type"] == "Polygon":
+            actual = [geometry["coordinates"]]
+        else:
+            actual = geometry["coordinates"]
+
+        if [len(rings) for rings in expected] != [len(rings) for rings in actual]:
+            return False, checked, float('inf')
+        for expected_rings, actual_rings in zip(expected, actual):
+            for expected_ring, actual_ring in zip(expected_rings, actual_rings):
+                if not _same_ring(expected_ring, np.asarray(actual_ring, dtype=np.int64)):
+                    return False, checked, float('inf')
+                checked += 1
+
+        for polygon in polygons:
+            for ring in polygon:
+                snapped = np.round((ring - translate) / scale) * scale + translate
+                max_error = max(max_error, float(np.max(np.abs(snapped - ring))))
+    return True, checked, max_error
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Encode ZIP boundaries as a shared-arc TopoJSON topology")
+    parser.add_argument("--input", default=None, help=f"boundary GeoJSON file (default: {OUTPUT_FILE})")
+    parser.add_argument("--output", default=None,
+                        help=f"topology file to write (default: {GEO_CONFIG['topology_path']})")
+    parser.add_argument("--quantization", type=int, default=GEO_CONFIG["topology_quantization"],
+                        help="integer grid steps across the boundary extent")
+    parser.add_argument("--zoom", type=int, default=None,
+                        help="simplify shared arcs for this map zoom level (default: no simplification)")
+    parser.add_argument("--verify", action="store_true",
+                        help="decode the topology and check it reproduces the quantized input (exit 1 on mismatch)")
+    args = parser.parse_args()
+
+    args.input = args.input or project_path(OUTPUT_FILE)
+    args.output = args.output or project_path(GEO_CONFIG["topology_path"])
+    if not os.path.exists(args.input):
+        print(f"❌ Error: Boundary file not found: {args.input}")
+        print("💡 Run filter_geojson.py first to create the King County boundary file.")
+        sys.exit(1)
+
+    features = load_features(args.input)
+    tolerance = 0.0 if args.zoom is None else zoom_tolerance(args.zoom)
+
+    start = time.perf_counter()
+    topology = encode_topology(features, args.quantization, tolerance)
+    encode_ms = (time.perf_counter() - start) * 1000
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(topology, f, separators=(',', ':'))
+
+    input_size = os.path.getsize(args.input)
+    output_size = os.path.getsize(args.output)
+    vertices_in = sum(len(ring) for _, polygons in features for polygon in polygons for ring in polygon)
+    vertices_out = sum(len(arc) for arc in topology["arcs"])
+    print(f"🗺️  Encoded {len(features)} features into {len(topology['arcs'])} arcs in {encode_ms:.0f} ms")
+    print(f"📐 Vertices: {vertices_in:,} → {vertices_out:,}")
+    print(f"📏 {input_size / 1024:.0f} KB → {output_size / 1024:.0f} KB "
+          f"({(1 - output_size / input_size) * 100:.1f}% smaller) → {args.output}")
+
+    start = time.perf_counter()
+    with open(args.input, 'r', encoding='utf-8') as f:
+        json.load(f)
+    geojson_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    with open(args.output, 'r', encoding='utf-8') as f:
+        decode_topology(json.load(f))
+    topology_ms = (time.perf_counter() - start) * 1000
+    print(f"⏱️  Parse: GeoJSON {geojson_ms:.0f} ms, topology + decode {topology_ms:.0f} ms")
+
+    if args.verify:
+        if tolerance > 0:
+            print("⚠️  Round-trip check skipped: simplified topologies do not reproduce the input")
+            return
+        ok, rings, max_error = verify_round_trip(features, topology)
+        if not ok:
+            print(f"❌ Round trip failed after {rings} matching rings")
+            sys.exit(1)
+        print(f"✅ Round trip reproduced {rings} rings (max quantization error {max_error:.2e}°)")
+
+
+if __name__ == "__main__":
+    main()
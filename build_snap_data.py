@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Build compact per-ZIP SNAP aggregates for the demo map
+
+Loads the SNAP retailer CSV once into a SnapRetailerStore and writes a
+small JSON file holding, for every ZIP code, the store-type counts, total
+stores, instruments to play, choropleth color/opacity and the retailer
+centroid.
+demo.html loads this file instead of downloading and aggregating the CSV.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from config import SNAP_CONFIG, project_path
+from snap_store import SnapRetailerStore
+
+
+def zip_color(store_count, color_buckets=None):
+    """Return the choropleth fill color for a store count (getSNAPZipCodeColor)"""
+    color_buckets = SNAP_CONFIG["color_buckets"] if color_buckets is None else color_buckets
+    for minimum, color in color_buckets:
+        if store_count >= minimum:
+            return color
+    return color_buckets[-1][1]
+
+
+def zip_opacity(store_count):
+    """Return the choropleth fill opacity for a store count"""
+    low, high = SNAP_CONFIG["opacity_range"]
+    return round(max(low, min(high, store_count / SNAP_CONFIG["opacity_full_count"])), 3)
+
+
+def aggregate_by_zip(store, store_type_instruments=None):
+    """Aggregate a SnapRetailerStore into per-ZIP summaries keyed by ZIP code"""
+    store_type_instruments = SNAP_CONFIG["store_type_instruments"] if store_type_instruments is None else store_type_instruments
+
+    # Rows without a ZIP code or store type cannot be placed on the map
+    valid = (store.categories["zip"][store.codes["zip"]] != '') & \
+            (store.categories["store_type"][store.codes["store_type"]] != '')
+    zip_labels, type_labels, counts = store.crosstab("zip", "store_type", mask=valid)
+    totals = counts.sum(axis=1)
+    lats = store.mean_by("zip", "latitude", mask=valid)
+    lngs = store.mean_by("zip", "longitude", mask=valid)
+
+    zips = {}
+    for i in np.flatnonzero(totals):
+        present = np.flatnonzero(counts[i])
+        store_types = {str(type_labels[j]): int(counts[i, j]) for j in present}
+        total = int(totals[i])
+        zips[str(zip_labels[i])] = {
+            "totalStores": total,
+            "storeTypes": store_types,
+            "instruments": sorted({store_type_instruments[t] for t in store_types if t in store_type_instruments}),
+            "color": zip_color(total),
+            "opacity": zip_opacity(total),
+            "coordinates": {
+                "lat": round(float(lats[i]), 5) if np.isfinite(lats[i]) else 0,
+                "lng": round(float(lngs[i]), 5) if np.isfinite(lngs[i]) else 0,
+            },
+        }
+    return zips
+
+
+def assign_zips_by_polygon(store, boundaries_path):
+    """Replace each retailer's listed ZIP with the boundary polygon that contains it"""
+    from snap_zip_assign import load_zip_polygons, assign_store
+
+    assigned = assign_store(store, load_zip_polygons(boundaries_path))
+    listed = store.categories["zip"][store.codes["zip"]]
+    changed = (assigned != '') & (assigned != listed)
+    print(f"📍 Polygon assignment moved {np.count_nonzero(changed)} retailers to a different ZIP")
+    # Retailers outside every polygon keep their listed ZIP
+    return store.recode("zip", np.where(assigned != '', assigned, listed))
+
+
+def build_aggregates(csv_path=None, output_path=None, assign_by_polygon=False):
+    """Parse the SNAP CSV and write the compact per-ZIP JSON file"""
+    csv_path = project_path(SNAP_CONFIG["csv_path"]) if csv_path is None else csv_path
+    output_path = project_path(SNAP_CONFIG["aggregates_path"]) if output_path is None else output_path
+
+    print(f"📁 Input: {csv_path}")
+    print(f"📁 Output: {output_path}")
+
+    if not os.path.exists(csv_path):
+        print(f"❌ Error: Input file not found: {csv_path}")
+        return False
+
+    store = SnapRetailerStore.from_csv(csv_path)
+    if assign_by_polygon:
+        boundaries_path = project_path(SNAP_CONFIG["boundaries_path"])
+        if os.path.exists(boundaries_path):
+            store = assign_zips_by_polygon(store, boundaries_path)
+        else:
+            print(f"⚠️  Boundary file not found, using listed ZIP codes: {boundaries_path}")
+
+    zips = aggregate_by_zip(store)
+    aggregates = {
+        "storeTypeInstruments": SNAP_CONFIG["store_type_instruments"],
+        "colorBuckets": [{"min": minimum, "color": color} for minimum, color in SNAP_CONFIG["color_buckets"]],
+        "zips": zips,
+    }
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(aggregates, f, separators=(',', ':'))
+
+    csv_size = os.path.getsize(csv_path) / 1024
+    json_size = os.path.getsize(output_path) / 1024
+    total_stores = sum(entry["totalStores"] for entry in zips.values())
+    print(f"📊 {total_stores} retailers aggregated into {len(zips)} ZIP codes")
+    print(f"📏 CSV size: {csv_size:.1f} KB")
+    print(f"📏 Aggregate size: {json_size:.1f} KB ({csv_size / json_size:.1f}x smaller)")
+    print(f"✅ Successfully created: {output_path}")
+    return True
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build per-ZIP SNAP aggregates for the demo map")
+    parser.add_argument("--assign-by-polygon", action="store_true",
+                        help="place retailers by point-in-polygon instead of their listed ZIP code")
+    args = parser.parse_args()
+
+    print("🏗️  SNAP Per-ZIP Aggregate Builder")
+    print("=" * 40)
+
+    if not build_aggregates(assign_by_polygon=args.assign_by_polygon):
+        print("\n❌ Build failed. Please check the error messages above.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,40 @@ Configuration file for Data Notes application
 
 This file contains various settings that can be customized to modify
 the behavior and appearance of the Data Notes application.
+
+File and directory paths below are relative to the project root; resolve
+them with project_path() so scripts work from any working directory.
 """
 
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def project_path(path):
+    """Resolve a configured path against the project root (absolute paths are returned unchanged)"""
+    return os.path.join(PROJECT_ROOT, path)
+
+
 # Audio Settings
 AUDIO_CONFIG = {
     "sample_rate": 44100,  # Audio sample rate in Hz
-    "channels": 1,         # Number of audio channels (1 = mono, 2 = stereo)
+    "channels": 2,         # Output channels: 1 = mono, 2 = stereo, more = a line of speakers, left to right
     "modulation_strength": 0.3,  # Strength of waveform modulation (0.0 to 1.0)
     "max_duration": 30,    # Maximum recording duration in seconds
+    "dtype": "float32",    # Sample format used by the processing engine
+    "resampler": "interp",  # Envelope resampler: "interp" (linear) or "fft" (scipy.signal.resample)
+    "block_size": 4096,    # Samples processed per block by streaming stages
+    "record_loudness": -20.0,  # Integrated loudness (LUFS, ITU-R BS.1770) recordings are normalized to
+    "output_loudness": -16.0,  # Integrated loudness (LUFS) modulated audio is normalized to before limiting
+    "clip_ceiling": 0.95,  # Peak level modulated audio is limited to
+    "limiter_lookahead": 0.005,  # Seconds the clip limiter looks ahead to ease into gain reduction
+    "limiter_release": 0.05,     # Seconds the clip limiter takes to recover after a peak
+    "modulation_mode": "amplitude",  # How the data shapes the recording: "amplitude" or "filter"
+    "filter_target": "cutoff",       # Filter mode: the data sweeps the low-pass "cutoff" or its "resonance"
+    "filter_cutoff_range": (200.0, 8000.0),  # Cutoff in Hz for the lowest and highest data values
+    "filter_q_range": (0.707, 8.0),  # Resonance (Q) range; the lower value is used while sweeping the cutoff
+    "filter_block": 256,   # Samples filtered with one set of coefficients
 }
 
 # Visualization Settings
@@ -31,6 +57,15 @@ DATA_CONFIG = {
     "amplitudes": [0.5, 0.3, 0.2],   # Amplitudes for each frequency component
 }
 
+# Data-Only Synthesis Settings (oscillator_bank.py)
+SYNTH_CONFIG = {
+    "frequency_range": (220.0, 880.0),  # Pitch range data values are mapped onto
+    "log_frequency": True,   # Map data to pitch on a logarithmic (musical) scale
+    "duration": 5.0,         # Seconds a data series is stretched over
+    "control_period": 64,    # Samples per control step of frequency, amplitude and pan
+    "peak": 0.8,             # Peak level rendered sonifications are normalized to
+}
+
 # UI Settings
 UI_CONFIG = {
     "page_title": "Data Notes - Data Sonification",
@@ -67,6 +102,146 @@ FILE_CONFIG = {
 ADVANCED_CONFIG = {
     "enable_debug": False,  # Enable debug mode with additional logging
     "cache_audio": True,    # Cache audio data in session state
+    "render_cache_size": 16,  # Modulated renders kept per process (0 disables)
+    "recording_mode": "webrtc",  # "webrtc" (microphone) or "simulated"
     "auto_normalize": True,  # Automatically normalize audio levels
     "prevent_clipping": True,  # Prevent audio clipping during modulation
 }
+
+# Benchmark Settings
+BENCHMARK_CONFIG = {
+    "durations": [1, 5, 30],  # Audio durations (seconds) to profile
+    "frame_size": 960,      # Samples per WebRTC frame in the simulated capture
+    # Peak traced allocation budget per stage, in bytes per second of audio
+    "memory_budgets": {
+        "capture": 1_500_000,
+        "normalize": 800_000,
+        "resample": 400_000,  # The float32 envelope; interpolation runs one block at a time
+        "modulate": 2_000_000,
+        "spatialize": 800_000,  # Stereo float32 output plus the one-channel pan curve
+        "encode": 800_000,
+    },
+    # Modules whose cold import time is measured
+    "startup_modules": ["app", "app_enhanced", "app_realtime", "app_simple", "app_unified"],
+    "startup_budget_ms": 2000,  # Maximum cumulative import time per module
+    # Heavy packages that must only be loaded on first use, never at import
+    "lazy_imports": ["librosa", "numba", "pydub", "scipy.signal", "plotly", "soundfile", "streamlit_webrtc"],
+}
+
+# SNAP Map Settings
+SNAP_CONFIG = {
+    "csv_path": "MapData/SNAP Retailer Location data KING county.csv",
+    "aggregates_path": "MapData/snap_zip_aggregates.json",
+    "boundaries_path": "MapData/King_County_Zipcodes.geojson",
+    # Instrument played for each store type (mirrors storeTypeMapping in demo.html)
+    "store_type_instruments": {
+        "Grocery Store": "bass",
+        "Convenience Store": "guitar",
+        "Supermarket": "lead",
+        "Super Store": "pad",
+        "Farmers and Markets": "piano_synth",
+        "Specialty Store": "kick_snare",
+        "Other": "hihat_openhat",
+    },
+    # Choropleth buckets as (minimum store count, fill color), highest first
+    "color_buckets": [
+        (20, "#7c3aed"),
+        (15, "#8b5cf6"),
+        (10, "#a78bfa"),
+        (5, "#c4b5fd"),
+        (0, "#f3f4f6"),
+    ],
+    "opacity_range": (0.3, 0.8),  # Fill opacity clamp for the choropleth
+    "opacity_full_count": 20,     # Store count that maps to full opacity
+}
+
+# Music Stem Settings
+MUSIC_CONFIG = {
+    "stems_dir": "Music",
+    # Instrument -> stem files layered for it (demo.html instrumentFiles)
+    "instrument_stems": {
+        "bass": ["Cymatics - Cedar - 95 BPM C# Min Bass.wav"],
+        "guitar": ["Cymatics - Cedar - 95 BPM C# Min Guitar.wav"],
+        "lead": ["Cymatics - Cedar - 95 BPM C# Min Lead.wav"],
+        "pad": ["Cymatics - Overtime - 95 BPM C# Min Pad.wav"],
+        "piano_synth": ["Cymatics - Overtime - 95 BPM C# Min Piano.wav",
+                        "Cymatics - Overtime - 95 BPM C# Min Synth.wav"],
+        "kick_snare": ["Cymatics - Ablaze Drum Loop - 95 BPM Kick.wav",
+                       "Cymatics - Ablaze Drum Loop - 95 BPM Snare.wav"],
+        "hihat_openhat": ["Cymatics - Ablaze Drum Loop - 95 BPM Hihat.wav",
+                          "Cymatics - Ablaze Drum Loop - 95 BPM Open Hat.wav"],
+    },
+    "premix_dir": "Music/premix",  # Premixed loops, one per store-type combination
+    "premix_peak": 0.89,           # Peak ceiling of a premix (about -1 dBFS)
+    "premix_subtype": "PCM_16",    # WAV sample format of premixed loops
+    "bpm": 95,                     # Tempo shared by every stem
+    "beats_per_bar": 4,
+    "asset_dir": "Music/assets",   # Normalized, bar-trimmed stems and their manifest
+    "asset_sample_rate": 48000,    # Sample rate every asset is converted to
+    "asset_channels": 2,
+    "asset_subtype": "PCM_16",     # WAV sample format of normalized assets
+    "compressed_formats": ["flac", "ogg"],  # Extra encodings written next to each WAV
+    "arrangement_path": "Music/arrangement.wav",            # County-wide mixdown
+    "arrangement_timeline_path": "Music/arrangement.json",  # Event timeline of the mixdown
+    "arrangement_bars_per_zip": 1,  # Bars each ZIP code plays for in the arrangement
+    "arrangement_fade": 0.005,      # Seconds of crossfade between consecutive ZIP codes
+    "arrangement_min_gain": 0.35,   # Level of the ZIP with the fewest stores (most stores = 1.0)
+}
+
+# Retailer Grain Synth Settings
+GRAIN_CONFIG = {
+    "output_path": "Music/retailer_grains.wav",
+    "sample_rate": 48000,
+    "duration": 60.0,        # Seconds the scan across all retailers takes
+    "scan": "west-east",     # Scan path that sets each retailer's onset time
+    "grain_length": 0.3,     # Seconds per note, including its decay
+    "root_hz": 69.30,        # C#2, the key of the music map stems
+    "scale": [0, 3, 5, 7, 10],  # C# minor pentatonic, semitones above the root
+    "octaves": 4,            # Pitch range latitude is spread over, south lowest
+    "peak": 0.89,            # Peak ceiling of the rendered mix (about -1 dBFS)
+    # Timbre per store type: harmonic amplitudes, attack and decay in seconds
+    "timbres": {
+        "Grocery Store": {"harmonics": [1.0, 0.5, 0.25], "attack": 0.004, "decay": 0.12},
+        "Convenience Store": {"harmonics": [1.0, 0.0, 0.33, 0.0, 0.2], "attack": 0.002, "decay": 0.06},
+        "Supermarket": {"harmonics": [1.0, 0.7, 0.5, 0.35, 0.25], "attack": 0.01, "decay": 0.15},
+        "Super Store": {"harmonics": [1.0, 0.4, 0.15], "attack": 0.03, "decay": 0.2},
+        "Farmers and Markets": {"harmonics": [1.0, 0.0, 0.0, 0.3], "attack": 0.001, "decay": 0.25},
+        "Specialty Store": {"harmonics": [1.0, 0.0, 0.5, 0.0, 0.3, 0.0, 0.15], "attack": 0.002, "decay": 0.09},
+        "Other": {"harmonics": [1.0], "attack": 0.002, "decay": 0.05},
+    },
+}
+
+# Boundary Geometry Settings
+GEO_CONFIG = {
+    "simplify_zooms": [9, 11, 13],  # Map zoom levels to build simplified boundaries for
+    "pixel_tolerance": 0.5,    # Allowed simplification error in screen pixels at each zoom
+    "coordinate_precision": 5,  # Decimal places kept for longitude/latitude (~1 m)
+    "leaflet_order": True,     # Write [lat, lng] pairs so the map can skip swapping them
+    "topology_path": "MapData/King_County_Zipcodes.topojson",
+    "topology_quantization": 100000,  # Integer grid steps across the boundary extent
+    "tiles_dir": "MapData/tiles",   # Static z/x/y boundary tiles served to the map
+    "tile_zooms": (8, 13),          # Inclusive zoom range to cut tiles for
+    "tile_clip_zoom": 11,           # From this zoom up, polygons are clipped to each tile
+    "tile_buffer": 4,               # Clip margin around each tile, in pixels of a 256-pixel tile
+}
+
+# Demo Server Settings
+SERVER_CONFIG = {
+    "port": 8000,          # Port run_demo_server.py listens on
+    "workers": 32,         # Maximum requests handled at the same time
+    "compress_min_bytes": 1024,  # Smaller responses are sent uncompressed
+    "compress_types": [    # Content types compressed when the client accepts it
+        "text/html", "text/css", "text/csv", "text/plain", "text/javascript",
+        "application/javascript", "application/json", "application/geo+json", "image/svg+xml",
+    ],
+    "compress_cache_bytes": 64 * 1024 * 1024,  # Memory kept for compressed file variants
+    "immutable_pattern": r"\.[0-9a-f]{8,}\.\w+$",  # File names carrying a content hash, e.g. app.3f9a2c1d.js
+    "immutable_max_age": 31536000,  # Cache lifetime in seconds for content-hashed files
+    "max_connections": 512,    # Open connections allowed by the --asyncio server
+    "keepalive_timeout": 15,   # Seconds an idle keep-alive connection stays open (--asyncio)
+    "render_port": 8001,       # Port render_server.py listens on
+    "render_processes": None,  # Render worker processes (None = one per CPU)
+    "render_queue": 8,         # Renders allowed to wait for a worker before answering 503
+    "render_timeout": 30,      # Seconds a request waits for its render before answering 504
+    "render_max_bytes": 16 * 1024 * 1024,  # Largest recording accepted in a request body
+}
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Composable DSP node graph for Data Notes
+
+A graph is a set of named nodes (gain, envelope modulation, pitch, filter,
+compressor, limiter, mix) wired by name and serialized as JSON:
+
+    {"output": "limit",
+     "nodes": [{"name": "in", "type": "input"},
+               {"name": "env", "type": "envelope", "inputs": ["in"], "params": {"data": [...]}},
+               {"name": "limit", "type": "limiter", "inputs": ["env"], "params": {"ceiling": 0.95}}]}
+
+A BlockScheduler compiles the graph once into topological order and gives
+every node one preallocated block buffer. It then pulls fixed-size blocks
+of mono audio through the nodes, reusing those buffers for every block.
+Each node keeps its own state (filter memory, pitch-shifter history, gain
+smoothing) between blocks. The same definition can stream blocks as they
+arrive or render a whole recording offline, without full-length
+intermediate arrays.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from dynamics import Compressor, LookaheadLimiter
+from engine_plan import get_plan, lowpass_sos, with_sample_rate
+
+NODE_TYPES = {}
+
+
+def register(type_name):
+    """Class decorator adding a node class to NODE_TYPES under `type_name`"""
+    def decorate(cls):
+        cls.type_name = type_name
+        NODE_TYPES[type_name] = cls
+        return cls
+    return decorate
+
+
+def db_to_gain(db):
+    return 10.0 ** (db / 20.0)
+
+
+class Node:
+    """A processing step that reads its input buffers and writes one output block
+
+    `params` holds only JSON-serializable values. prepare() is called once
+    before the first block and again when the graph is reset. `latency` is
+    the number of frames the node delays its input by.
+    """
+
+    defaults = {}
+    latency = 0
+
+    def __init__(self, name, inputs=(), params=None):
+        unknown = set(params or {}) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.type_name} node '{name}': {', '.join(sorted(unknown))}")
+        self.name = name
+        self.inputs = list(inputs)
+        self.params = {**self.defaults, **(params or {})}
+
+    def prepare(self, sample_rate, block_size, length):
+        """Reset state for a new stream; `length` is the total frame count when known, else None"""
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.length = length
+
+    def process(self, inputs, out, frame, count):
+        """Write `count` frames to `out` from the `inputs` buffers; `frame` is the stream position"""
+        raise NotImplementedError
+
+    def to_dict(self):
+        node = {"name": self.name, "type": self.type_name}
+        if self.inputs:
+            node["inputs"] = self.inputs
+        params = {key: value for key, value in self.params.items() if value != self.defaults[key]}
+        if params:
+            node["params"] = params
+        return node
+
+
+@register("input")
+class InputNode(Node):
+    """The audio pulled into the graph; filled by the scheduler"""
+
+    def process(self, inputs, out, frame, count):
+        pass
+
+
+@register("gain")
+class GainNode(Node):
+    """Fixed gain in decibels"""
+
+    defaults = {"db": 0.0}
+
+    def process(self, inputs, out, frame, count):
+        np.multiply(inputs[0][:count], db_to_gain(self.params["db"]), out=out[:count])
+
+
+@register("mix")
+class MixNode(Node):
+    """Sum of the inputs, each with its own gain in decibels (0 dB when not given)"""
+
+    defaults = {"db": []}
+
+    def process(self, inputs, out, frame, count):
+        gains = [db_to_gain(db) for db in self.params["db"]] + [1.0] * (len(inputs) - len(self.params["db"]))
+        np.multiply(inputs[0][:count], gains[0], out=out[:count])
+        for buffer, gain in zip(inputs[1:], gains[1:]):
+            out[:count] += buffer[:count] * gain
+
+
+class DataCurveNode(Node):
+    """Base for nodes driven by a data series stretched over the stream
+
+    The curve spans `duration` seconds, or the whole recording when the
+    duration is null and the scheduler knows the length. Interpolation
+    works in block-sized buffers allocated here, so curve() allocates
+    nothing per block.
+    """
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        self.data = np.asarray(self.params["data"], dtype=np.float64)
+        duration = self.params["duration"]
+        frames = duration * sample_rate if duration else length
+        if len(self.data) and not frames:
+            raise ValueError(f"{self.type_name} node '{self.name}' needs a duration when streaming")
+        self.scale = (len(self.data) - 1) / max((frames or 1) - 1, 1)
+        self.slopes = np.diff(self.data) if len(self.data) > 1 else np.zeros(1)
+        self.index = np.empty(block_size, dtype=np.int64)
+        self.fraction = np.empty(block_size)
+
+    def curve(self, frames, out):
+        """Write the data values at stream frame positions to `out` (the last value holds past the end)"""
+        count = len(frames)
+        position = self.fraction[:count]
+        np.multiply(frames, self.scale, out=position)
+        np.clip(position, 0.0, len(self.data) - 1, out=position)
+        np.floor(position, out=out)  # `out` doubles as scratch for the whole part
+        np.minimum(out, len(self.slopes) - 1, out=out)
+        index = self.index[:count]
+        index[:] = out
+        position -= out
+        np.take(self.slopes, index, out=out, mode="clip")  # Indices are in range; "clip" skips a buffered copy
+        out *= position
+        np.take(self.data, index, out=position, mode="clip")
+        out += position
+        return out
+
+
+@register("envelope")
+class EnvelopeNode(DataCurveNode):
+    """Amplitude modulation by a data curve, as in engine_plan.apply_waveform_modulation"""
+
+    defaults = {"data": [], "strength": 0.3, "duration": None}
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        peak = np.max(np.abs(self.data)) if len(self.data) else 0.0
+        self.depth = self.params["strength"] / peak if peak > 0 else 0.0
+        self.ramp = np.arange(block_size, dtype=np.float64)
+        self.frames = np.empty(block_size)
+        self.envelope = np.empty(block_size)
+
+    def process(self, inputs, out, frame, count):
+        if not len(self.data):
+            out[:count] = inputs[0][:count]
+            return
+        frames = np.add(self.ramp[:count], frame, out=self.frames[:count])
+        envelope = self.curve(frames, self.envelope[:count])
+        envelope *= self.depth
+        envelope += 1.0
+        out[:count] = envelope  # Cast first: a mixed-precision multiply would allocate cast buffers
+        out[:count] *= inputs[0][:count]
+
+
+@register("filter")
+class FilterNode(DataCurveNode):
+    """Resonant low-pass whose cutoff (or Q) follows a data curve, one section per `section` frames
+
+    With no data the filter is static at the low end of `q` and the
+    geometric middle of `cutoff`. Filter state is carried between sections
+    and blocks.
+    """
+
+    defaults = {"data": [], "duration": None, "target": "cutoff", "cutoff": [200.0, 8000.0],
+                "q": [0.707, 8.0], "section": 256}
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        if self.params["target"] not in ("cutoff", "resonance"):
+            raise ValueError(f"Unknown filter target '{self.params['target']}'")
+        self.low, self.high = (float(np.min(self.data)), float(np.max(self.data))) if len(self.data) else (0.0, 0.0)
+        self.state = np.zeros((1, 2))
+
+    def sections(self, centres):
+        """Second-order sections for sections centred on the given stream frames"""
+        values = self.curve(centres, np.empty(len(centres))) if len(self.data) else np.zeros(len(centres))
+        unit = (values - self.low) / (self.high - self.low) if self.high > self.low else np.full(len(centres), 0.5)
+        (low_cutoff, high_cutoff), (low_q, high_q) = self.params["cutoff"], self.params["q"]
+        if self.params["target"] == "cutoff":
+            cutoff, q = low_cutoff * (high_cutoff / low_cutoff) ** unit, np.full(len(centres), low_q)
+        else:
+            cutoff, q = np.full(len(centres), np.sqrt(low_cutoff * high_cutoff)), low_q * (high_q / low_q) ** unit
+        return lowpass_sos(cutoff, q, self.sample_rate)
+
+    def process(self, inputs, out, frame, count):
+        from scipy import signal
+
+        size = self.params["section"]
+        starts = np.arange(0, count, size)
+        sos = self.sections(frame + starts + size / 2)
+        for index, start in enumerate(starts):
+            block = slice(start, min(start + size, count))
+            out[block], self.state = signal.sosfilt(sos[index:index + 1], inputs[0][block], zi=self.state)
+
+
+@register("pitch")
+class PitchNode(Node):
+    """Duration-preserving pitch shift with two crossfaded read taps on a delay line
+
+    The taps sweep through a `window`-frame delay line at the pitch ratio
+    and are crossfaded with complementary sin² gains, so their sum keeps a
+    constant level while each tap jumps back unheard. All per-block work
+    happens in scratch buffers allocated in prepare().
+    """
+
+    defaults = {"semitones": 0.0, "window": 2048}
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        window = self.params["window"]
+        self.history = np.zeros(window + 2 + block_size)  # Past samples followed by the current block
+        self.delay = 0.0
+        self.drift = 1.0 - 2.0 ** (self.params["semitones"] / 12.0)  # Delay change per frame
+        self.offsets = np.arange(block_size, dtype=np.float64)
+        self.delays, self.tap, self.position, self.samples, self.previous, self.result = np.empty((6, block_size))
+        self.index = np.empty(block_size, dtype=np.int64)
+
+    def process(self, inputs, out, frame, count):
+        if self.params["semitones"] == 0:
+            out[:count] = inputs[0][:count]
+            return
+        window = self.params["window"]
+        past = window + 2
+        self.history[past:past + count] = inputs[0][:count]
+
+        delays = np.multiply(self.offsets[:count], self.drift, out=self.delays[:count])
+        delays += self.delay
+        np.mod(delays, window, out=delays)
+        self.delay = float(np.mod(self.delay + self.drift * count, window))
+        tap, position, index = self.tap[:count], self.position[:count], self.index[:count]
+        samples, previous, result = self.samples[:count], self.previous[:count], self.result[:count]
+        result[:] = 0.0
+        for shift in (0.0, window / 2):
+            np.add(delays, shift, out=tap)
+            np.mod(tap, window, out=tap)
+
+            # Linear interpolation between history[index] and history[index + 1]
+            np.subtract(self.offsets[:count], tap, out=position)
+            position += past - 1
+            np.floor(position, out=previous)
+            index[:] = previous
+            position -= previous
+            np.take(self.history, index, out=previous, mode="clip")  # Indices are in range; "clip" skips a copy
+            np.take(self.history[1:], index, out=samples, mode="clip")
+            samples -= previous
+            samples *= position
+            samples += previous
+
+            # sin² crossfade gain
+            tap *= np.pi / window
+            np.sin(tap, out=tap)
+            np.square(tap, out=tap)
+            samples *= tap
+            result += samples
+        out[:count] = result
+
+        # Keep the last `past` samples for the next block
+        self.history[:past] = self.history[count:count + past]
+
+
+@register("compressor")
+class CompressorNode(Node):
+    """Downward peak compressor (dynamics.Compressor); times in seconds, levels in dB"""
+
+    defaults = {"threshold_db": -18.0, "ratio": 4.0, "knee_db": 6.0, "attack": 0.005, "release": 0.1,
+                "makeup_db": 0.0}
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        self.compressor = Compressor(sample_rate, **self.params)
+
+    def process(self, inputs, out, frame, count):
+        self.compressor.process(inputs[0][:count], out=out[:count])
+
+
+@register("limiter")
+class LimiterNode(Node):
+    """Lookahead brickwall limiter (dynamics.LookaheadLimiter); delays its input by `lookahead` seconds"""
+
+    defaults = {"ceiling": 0.95, "lookahead": 0.005, "release": 0.05}
+
+    def prepare(self, sample_rate, block_size, length):
+        super().prepare(sample_rate, block_size, length)
+        self.limiter = LookaheadLimiter(sample_rate, block_size=block_size, **self.params)
+        self.latency = self.limiter.latency
+
+    def process(self, inputs, out, frame, count):
+        self.limiter.process(inputs[0][:count], out=out[:count])
+
+
+class Graph:
+    """Named nodes and the name of the node whose output is the graph's output"""
+
+    def __init__(self, nodes, output):
+        self.nodes = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate node name '{node.name}'")
+            self.nodes[node.name] = node
+        if output not in self.nodes:
+            raise ValueError(f"Output node '{output}' is not in the graph")
+        self.output = output
+
+    @classmethod
+    def from_dict(cls, definition):
+        nodes = []
+        for spec in definition["nodes"]:
+            if spec["type"] not in NODE_TYPES:
+                raise ValueError(f"Unknown node type '{spec['type']}', expected one of {', '.join(NODE_TYPES)}")
+            nodes.append(NODE_TYPES[spec["type"]](spec["name"], spec.get("inputs", ()), spec.get("params")))
+        return cls(nodes, definition["output"])
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_dict(self):
+        return {"output": self.output, "nodes": [node.to_dict() for node in self.nodes.values()]}
+
+    def to_json(self, indent=1):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def order(self):
+        """Names of the nodes the output depends on, each after all of its inputs"""
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Graph has a cycle through '{name}'")
+            if name not in self.nodes:
+                raise ValueError(f"Unknown input node '{name}'")
+            visiting.add(name)
+            for dependency in self.nodes[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        visit(self.output)
+        return order
+
+
+class BlockScheduler:
+    """Pulls fixed-size blocks through a graph using one preallocated buffer per node"""
+
+    def __init__(self, graph, sample_rate, block_size, dtype=np.float32):
+        self.graph = graph
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.dtype = np.dtype(dtype)
+        self.steps = [(graph.nodes[name], graph.nodes[name].inputs) for name in graph.order()]
+        self.buffers = {name: np.zeros(block_size, dtype=self.dtype) for name in graph.order()}
+        self.inputs = [name for name in self.buffers if isinstance(graph.nodes[name], InputNode)]
+
+    def reset(self, length=None):
+        """Start a new stream; `length` is its total frame count if known
+
+        Also works out the graph's latency: the largest delay along any
+        path to the output. Branches are not delay-compensated against each
+        other, so limiters belong after any mix.
+        """
+        self.frame = 0
+        delays = {}
+        for node, input_names in self.steps:
+            node.prepare(self.sample_rate, self.block_size, length)
+            delays[node.name] = node.latency + max((delays[name] for name in input_names), default=0)
+        self.latency = delays[self.graph.output]
+
+    def process_block(self, block):
+        """Run one block (at most block_size frames) and return a view of the output buffer
+
+        Call reset() before the first block of a stream. The view is overwritten by the next call; copy it to keep it.
+        """
+        count = len(block)
+        for name in self.inputs:
+            self.buffers[name][:count] = block
+        for node, input_names in self.steps:
+            node.process([self.buffers[name] for name in input_names], self.buffers[node.name], self.frame, count)
+        self.frame += count
+        return self.buffers[self.graph.output][:count]
+
+    def stream(self, chunks, length=None):
+        """Process an iterable of audio chunks as they arrive, yielding each output block (a reused view)
+
+        Chunks of any size are regathered into full blocks in a
+        preallocated buffer, so a stream goes through the same blocks as
+        render() and gives identical output: the graph's latency is
+        compensated by holding back its first frames and pushing the
+        delayed tail out with silence once the input ends. Data curves
+        without a duration need the stream's total `length`.
+        """
+        skip = self.latency
+        for result in self._blocks(chunks, length):
+            if skip >= len(result):
+                skip -= len(result)
+                continue
+            yield result[skip:]
+            skip = 0
+
+    def _blocks(self, chunks, length):
+        """Yield raw graph output for `chunks` regathered into full blocks, then for `latency` frames of silence"""
+        self.reset(length)
+        pending = np.empty(self.block_size, dtype=self.dtype)
+        filled = 0
+        for chunk in chunks:
+            while len(chunk):
+                taken = min(len(chunk), self.block_size - filled)
+                pending[filled:filled + taken] = chunk[:taken]
+                chunk = chunk[taken:]
+                filled += taken
+                if filled == self.block_size:
+                    yield self.process_block(pending)
+                    filled = 0
+
+        remaining = filled + self.latency
+        pending[filled:] = 0.0
+        while remaining > 0:
+            count = min(self.block_size, remaining)
+            yield self.process_block(pending[:count])
+            pending[:filled] = 0.0  # Only silence follows the last frames of input
+            remaining -= count
+
+    def render(self, audio):
+        """Process a whole recording offline into one output array, aligned with the input
+
+        The graph's latency is compensated by feeding silence after the
+        recording and dropping the same number of frames from the start.
+        """
+        self.reset(len(audio))
+        output = np.empty(len(audio), dtype=self.dtype)
+        padded = np.zeros(self.block_size, dtype=self.dtype)
+        total = len(audio) + self.latency
+        for start in range(0, total, self.block_size):
+            block = audio[start:start + self.block_size]
+            if len(block) < self.block_size and start + len(block) < total:
+                # Last frames of the recording, then silence to push out the delayed tail
+                padded[:len(block)] = block
+                padded[len(block):] = 0.0
+                block = padded[:min(self.block_size, total - start)]
+            result = self.process_block(block)
+            first = start - self.latency
+            if first + len(result) > 0:
+                output[max(first, 0):first + len(result)] = result[max(-first, 0):]
+        return output
+
+
+def default_graph(waveform_data, plan):
+    """The app pipeline as a graph: envelope (or filter) modulation by the data, then the clip limiter
+
+    Loudness normalization needs the whole recording measured first, so it
+    stays outside the graph (see engine_plan.finish_output).
+    """
+    data = [float(value) for value in waveform_data]
+    if plan.modulation_mode == "filter":
+        modulation = FilterNode("modulate", ["input"], {
+            "data": data, "target": plan.filter_target, "cutoff": list(plan.filter_cutoff_range),
+            "q": list(plan.filter_q_range), "section": plan.filter_block,
+        })
+    else:
+        modulation = EnvelopeNode("modulate", ["input"], {"data": data, "strength": plan.modulation_strength})
+    limiter = LimiterNode("limit", ["modulate"], {
+        "ceiling": plan.clip_ceiling, "lookahead": plan.limiter_lookahead, "release": plan.limiter_release,
+    })
+    return Graph([InputNode("input"), modulation, limiter], "limit")
+
+
+def main():
+    """Render a WAV file through a graph definition"""
+    import soundfile as sf
+
+    from engine_plan import generate_waveform_data, prepare_recording
+
+    parser = argparse.ArgumentParser(description="Process audio through a DSP graph")
+    parser.add_argument("input", nargs="?", help="WAV file to process")
+    parser.add_argument("output", nargs="?", help="WAV file to write")
+    parser.add_argument("--graph", help="graph JSON file (defaults to the app pipeline with the sample data)")
+    parser.add_argument("--print-default", action="store_true", help="print the default graph as JSON and exit")
+    args = parser.parse_args()
+
+    plan = get_plan()
+    if args.graph:
+        with open(args.graph, 'r', encoding='utf-8') as f:
+            graph = Graph.from_json(f.read())
+    else:
+        graph = default_graph(generate_waveform_data(plan)[1], plan)
+
+    if args.print_default:
+        print(graph.to_json())
+        return
+    if not args.input or not args.output:
+        parser.error("input and output WAV files are required")
+
+    audio_data, sample_rate = sf.read(args.input, dtype=plan.dtype.name)
+    plan = with_sample_rate(plan, sample_rate)
+    audio_data = prepare_recording(audio_data, plan)
+    scheduler = BlockScheduler(graph, sample_rate, plan.block_size, plan.dtype)
+    sf.write(args.output, scheduler.render(audio_data), sample_rate)
+    print(f"✅ {len(audio_data) / sample_rate:.2f}s processed through {len(scheduler.steps)} nodes → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Dynamics processing for Data Notes: compressor and lookahead limiter
+
+Both processors run on blocks and keep their state between blocks, so they
+work on a stream as well as on a whole recording. Every step is vectorized
+over the samples of a block:
+
+- The static compressor curve maps input level to gain reduction (in dB)
+  for a whole block at once, with an optional soft knee.
+- The envelope follower holds the gain reduction and lets it fall back
+  exponentially with the release time (a running maximum of decay-weighted
+  values). It then smooths the rise with a one-pole attack filter run by
+  scipy.signal.lfilter, carrying the filter state into the next block.
+- The brickwall limiter looks ahead by a few milliseconds. The gain
+  reduction each sample needs is spread over the lookahead window before
+  that sample is output, so no sample leaves above the ceiling and no
+  whole-array peak scan is needed.
+"""
+
+import numpy as np
+
+# Decay weights stay below e**MAX_DECAY_EXPONENT, well inside float64 range
+MAX_DECAY_EXPONENT = 600.0
+
+
+def time_coefficient(time_constant, sample_rate):
+    """Per-sample coefficient of a one-pole smoother with the given time constant (seconds)"""
+    if time_constant <= 0:
+        return 0.0
+    return float(np.exp(-1.0 / (time_constant * sample_rate)))
+
+
+def level_db(samples, floor_db=-120.0):
+    """Instantaneous level of each sample in dBFS, floored at `floor_db`"""
+    level = np.abs(samples, dtype=np.float64)
+    np.maximum(level, 10.0 ** (floor_db / 20.0), out=level)
+    np.log10(level, out=level)
+    level *= 20.0
+    return level
+
+
+def gain_reduction_db(level, threshold_db, ratio, knee_db=0.0):
+    """Static compressor curve: gain reduction in dB (>= 0) for levels in dBFS
+
+    Above the threshold, every `ratio` dB of input gives 1 dB of output.
+    With a knee, the ratio eases in quadratically over knee_db dB centred
+    on the threshold.
+    """
+    over = np.asarray(level, dtype=np.float64) - threshold_db
+    slope = 1.0 - 1.0 / ratio
+    if knee_db <= 0:
+        return np.maximum(over, 0.0) * slope
+    half = knee_db / 2.0
+    knee = slope * np.square(np.clip(over + half, 0.0, knee_db)) / (2.0 * knee_db)
+    return np.where(over > half, over * slope, knee)
+
+
+def release_hold(values, coefficient, previous=0.0):
+    """Peak hold with exponential release: out[n] = max(values[n], coefficient * out[n - 1])
+
+    Vectorized as out[n] = c**n * max(c * previous, max over k <= n of
+    values[k] * c**-k). The block is cut into chunks short enough that the
+    c**-k weights stay finite. `previous` is the last output of the
+    previous block.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    output = np.empty_like(values)
+    if coefficient <= 0:
+        output[:] = values
+        return output
+    chunk = max(1, int(MAX_DECAY_EXPONENT / -np.log(coefficient))) if coefficient < 1 else len(values) or 1
+    for start in range(0, len(values), chunk):
+        segment = values[start:start + chunk]
+        decay = coefficient ** np.arange(len(segment), dtype=np.float64)
+        held = output[start:start + len(segment)]
+        np.divide(segment, decay, out=held)
+        np.maximum.accumulate(held, out=held)
+        np.maximum(held, coefficient * previous, out=held)
+        held *= decay
+        previous = held[-1]
+    return output
+
+
+class Compressor:
+    """Feed-forward peak compressor with an attack/release envelope follower
+
+    Times are in seconds, levels in dB. process() takes one block at a time
+    and continues the envelope from the previous block.
+    """
+
+    def __init__(self, sample_rate, threshold_db=-18.0, ratio=4.0, knee_db=6.0, attack=0.005, release=0.1,
+                 makeup_db=0.0):
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.knee_db = knee_db
+        self.makeup_db = makeup_db
+        self.attack_coefficient = time_coefficient(attack, sample_rate)
+        self.release_coefficient = time_coefficient(release, sample_rate)
+        self.reset()
+
+    def reset(self):
+        self.held = 0.0
+        self.state = np.zeros(1)  # lfilter state of the attack smoother
+
+    def reduction(self, block):
+        """Smoothed gain reduction in dB for each sample of the block"""
+        from scipy import signal
+
+        target = gain_reduction_db(level_db(block), self.threshold_db, self.ratio, self.knee_db)
+        held = release_hold(target, self.release_coefficient, self.held)
+        if len(held):
+            self.held = held[-1]
+        a = self.attack_coefficient
+        smoothed, self.state = signal.lfilter([1.0 - a], [1.0, -a], held, zi=self.state)
+        return smoothed
+
+    def process(self, block, out=None):
+        """Compress one block into `out` (a new array by default) and return it"""
+        gain = self.reduction(block)
+        np.subtract(self.makeup_db, gain, out=gain)
+        gain *= 1.0 / 20.0
+        np.power(10.0, gain, out=gain)
+        return np.multiply(block, gain, out=out, casting="unsafe")
+
+
+class LookaheadLimiter:
+    """Brickwall peak limiter that delays the audio by `lookahead` seconds
+
+    Each sample needs a gain reduction of max(0, level - ceiling) dB. The
+    reduction is first held over the lookahead window, then released with
+    the release time, then averaged over the window. The average over the
+    window is never below the reduction of the sample being output, so no
+    output exceeds the ceiling, and the gain changes with no steps.
+    Output lags input by `latency` frames; flush() returns the tail.
+    """
+
+    def __init__(self, sample_rate, ceiling=0.95, lookahead=0.005, release=0.05, block_size=4096):
+        self.ceiling = ceiling
+        self.ceiling_db = 20.0 * np.log10(ceiling)
+        self.latency = max(1, int(round(lookahead * sample_rate)))
+        self.release_coefficient = time_coefficient(release, sample_rate)
+        self.block_size = block_size
+        # Each buffer holds the last `latency` values followed by the current block
+        self.audio = np.zeros(self.latency + block_size)
+        self.needed = np.zeros(self.latency + block_size)
+        self.released = np.zeros(self.latency + block_size)
+        self.sums = np.zeros(self.latency + block_size + 1)
+        self.reset()
+
+    def reset(self):
+        self.audio[:] = 0.0
+        self.needed[:] = 0.0
+        self.released[:] = 0.0
+        self.previous = 0.0
+
+    def process(self, block, out=None):
+        """Limit one block (at most block_size frames); returns the output delayed by `latency` frames"""
+        count = len(block)
+        lag = self.latency
+        if count > self.block_size:
+            raise ValueError(f"Block of {count} frames is larger than the limiter's {self.block_size}")
+        audio, needed, released = self.audio[:lag + count], self.needed[:lag + count], self.released[:lag + count]
+        audio[lag:] = block
+        np.subtract(level_db(block), self.ceiling_db, out=needed[lag:])
+        np.maximum(needed[lag:], 0.0, out=needed[lag:])
+
+        # Hold each requirement over the lookahead, release it, then average it over the lookahead
+        held = np.lib.stride_tricks.sliding_window_view(needed, lag + 1).max(axis=1)
+        released[lag:] = release_hold(held, self.release_coefficient, self.previous)
+        if count:
+            self.previous = released[-1]
+        sums = self.sums[:lag + count + 1]
+        np.cumsum(released, out=sums[1:])
+        reduction = sums[lag + 1:] - sums[:count]
+        reduction *= -1.0 / (20.0 * (lag + 1))
+        np.power(10.0, reduction, out=reduction)
+
+        out = np.multiply(audio[:count], reduction, out=out, casting="unsafe")
+        np.clip(out, -self.ceiling, self.ceiling, out=out)  # Rounding guard
+
+        # Keep the last `latency` values for the next block
+        for buffer in (self.audio, self.needed, self.released):
+            buffer[:lag] = buffer[count:count + lag]
+        return out
+
+    def flush(self):
+        """Output the last `latency` frames still held in the lookahead buffer"""
+        tail = np.empty(self.latency)
+        for start in range(0, self.latency, self.block_size):
+            piece = tail[start:start + self.block_size]
+            self.process(np.zeros(len(piece)), out=piece)
+        return tail
+
+
+def compress(audio_data, sample_rate, block_size=4096, out=None, **settings):
+    """Run a Compressor over a whole recording a block at a time; `out` may be the input itself"""
+    compressor = Compressor(sample_rate, **settings)
+    out = np.empty_like(audio_data) if out is None else out
+    for start in range(0, len(audio_data), block_size):
+        block = slice(start, start + block_size)
+        compressor.process(audio_data[block], out=out[block])
+    return out
+
+
+def limit(audio_data, sample_rate, ceiling=0.95, lookahead=0.005, release=0.05, block_size=4096, out=None,
+          gain=1.0):
+    """Brickwall-limit a whole recording, compensating the lookahead delay
+
+    `gain` is applied to the input on the way into the limiter, so a level
+    change and its peak limiting take one pass. Output frames are written
+    after the matching input frames have been read, so `out` may be the
+    input itself.
+    """
+    limiter = LookaheadLimiter(sample_rate, ceiling, lookahead, release, block_size)
+    out = np.empty_like(audio_data) if out is None else out
+    lag = limiter.latency
+    for start in range(0, len(audio_data), block_size):
+        block = audio_data[start:start + block_size]
+        limited = limiter.process(block * gain if gain != 1.0 else block)
+        first = start - lag
+        if first + len(limited) > 0:
+            out[max(first, 0):first + len(limited)] = limited[max(-first, 0):]
+    tail = limiter.flush()
+    first = len(audio_data) - lag
+    out[max(first, 0):] = tail[max(-first, 0):lag]
+    return out
@@ -0,0 +1,331 @@
+"""
+Processing engine plan for Data Notes
+
+Reads the settings in config.py once per process and compiles them into an
+immutable EnginePlan: sample format, resampler, buffer and cache sizes and
+the data-generation parameters. Every session and rerun shares the same
+plan, and the audio helpers below take it instead of hardcoded values.
+"""
+
+import io
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+import numpy as np
+
+import config
+from dynamics import limit
+from loudness import integrated_loudness, normalize_loudness
+
+RESAMPLERS = ("interp", "fft")
+RECORDING_MODES = ("webrtc", "simulated")
+MODULATION_MODES = ("amplitude", "filter")
+FILTER_TARGETS = ("cutoff", "resonance")
+
+
+@dataclass(frozen=True)
+class EnginePlan:
+    """Immutable processing parameters shared by all sessions in a process"""
+    sample_rate: int
+    channels: int
+    dtype: np.dtype
+    resampler: str
+    block_size: int
+    max_samples: int
+    modulation_strength: float
+    record_loudness: float
+    output_loudness: float
+    clip_ceiling: float
+    limiter_lookahead: float
+    limiter_release: float
+    modulation_mode: str
+    filter_target: str
+    filter_cutoff_range: tuple
+    filter_q_range: tuple
+    filter_block: int
+    auto_normalize: bool
+    prevent_clipping: bool
+    render_cache_size: int
+    recording_mode: str
+    num_points: int
+    time_range: float
+    noise_level: float
+    frequencies: tuple
+    amplitudes: tuple
+
+
+def compile_plan(audio_config=None, data_config=None, advanced_config=None):
+    """Validate the configuration dictionaries and build an EnginePlan"""
+    audio_config = config.AUDIO_CONFIG if audio_config is None else audio_config
+    data_config = config.DATA_CONFIG if data_config is None else data_config
+    advanced_config = config.ADVANCED_CONFIG if advanced_config is None else advanced_config
+
+    resampler = audio_config.get("resampler", "interp")
+    if resampler not in RESAMPLERS:
+        raise ValueError(f"Unknown resampler '{resampler}', expected one of {RESAMPLERS}")
+
+    recording_mode = advanced_config.get("recording_mode", "webrtc")
+    if recording_mode not in RECORDING_MODES:
+        raise ValueError(f"Unknown recording mode '{recording_mode}', expected one of {RECORDING_MODES}")
+
+    modulation_mode = audio_config.get("modulation_mode", "amplitude")
+    if modulation_mode not in MODULATION_MODES:
+        raise ValueError(f"Unknown modulation mode '{modulation_mode}', expected one of {MODULATION_MODES}")
+
+    filter_target = audio_config.get("filter_target", "cutoff")
+    if filter_target not in FILTER_TARGETS:
+        raise ValueError(f"Unknown filter target '{filter_target}', expected one of {FILTER_TARGETS}")
+
+    dtype = np.dtype(audio_config.get("dtype", "float32"))
+    if dtype.kind != "f":
+        raise ValueError(f"Audio dtype must be floating point, got {dtype}")
+
+    if len(data_config["frequencies"]) != len(data_config["amplitudes"]):
+        raise ValueError("DATA_CONFIG frequencies and amplitudes must have the same length")
+
+    sample_rate = int(audio_config["sample_rate"])
+    return EnginePlan(
+        sample_rate=sample_rate,
+        channels=int(audio_config.get("channels", 1)),
+        dtype=dtype,
+        resampler=resampler,
+        block_size=int(audio_config.get("block_size", 4096)),
+        max_samples=int(audio_config.get("max_duration", 30) * sample_rate),
+        modulation_strength=float(audio_config["modulation_strength"]),
+        record_loudness=float(audio_config.get("record_loudness", -20.0)),
+        output_loudness=float(audio_config.get("output_loudness", -16.0)),
+        clip_ceiling=float(audio_config.get("clip_ceiling", 0.95)),
+        limiter_lookahead=float(audio_config.get("limiter_lookahead", 0.005)),
+        limiter_release=float(audio_config.get("limiter_release", 0.05)),
+        modulation_mode=modulation_mode,
+        filter_target=filter_target,
+        filter_cutoff_range=tuple(float(v) for v in audio_config.get("filter_cutoff_range", (200.0, 8000.0))),
+        filter_q_range=tuple(float(v) for v in audio_config.get("filter_q_range", (0.707, 8.0))),
+        filter_block=int(audio_config.get("filter_block", 256)),
+        auto_normalize=bool(advanced_config.get("auto_normalize", True)),
+        prevent_clipping=bool(advanced_config.get("prevent_clipping", True)),
+        render_cache_size=int(advanced_config.get("render_cache_size", 16)),
+        recording_mode=recording_mode,
+        num_points=int(data_config["num_points"]),
+        time_range=float(data_config["time_range"]),
+        noise_level=float(data_config["noise_level"]),
+        frequencies=tuple(data_config["frequencies"]),
+        amplitudes=tuple(data_config["amplitudes"]),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_plan():
+    """Return the process-wide plan compiled from config.py"""
+    return compile_plan()
+
+
+def with_sample_rate(plan, sample_rate):
+    """Return `plan` for audio at another sample rate, keeping the same maximum duration in seconds"""
+    if sample_rate == plan.sample_rate:
+        return plan
+    return replace(plan, sample_rate=int(sample_rate),
+                   max_samples=int(round(plan.max_samples * sample_rate / plan.sample_rate)))
+
+
+def generate_waveform_data(plan, seed=None):
+    """Generate the sample line graph data described by the plan"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, plan.time_range, plan.num_points)
+    y = rng.normal(0, plan.noise_level, plan.num_points)
+    for frequency, amplitude in zip(plan.frequencies, plan.amplitudes):
+        y += np.sin(frequency * x) * amplitude
+    return x, y
+
+
+def simulate_recording(plan, duration=3.0, seed=None):
+    """Create a synthetic voice-like signal for demo mode"""
+    rng = np.random.default_rng(seed)
+    num_samples = min(int(plan.sample_rate * duration), plan.max_samples)
+    t = np.arange(num_samples, dtype=plan.dtype) / plan.dtype.type(plan.sample_rate)
+    voice_signal = np.sin(2 * np.pi * 200 * t) * 0.5
+    voice_signal += np.sin(2 * np.pi * 400 * t) * 0.2
+    voice_signal += rng.normal(0, 0.1, num_samples).astype(plan.dtype)
+    return voice_signal.astype(plan.dtype, copy=False)
+
+
+def prepare_recording(audio_data, plan):
+    """Convert captured audio to the plan's mono format and normalize its loudness
+
+    Every recording is brought to plan.record_loudness (LUFS) in place, with
+    peaks above the clip ceiling limited, so quiet and loud microphones
+    sound alike.
+    """
+    audio_data = np.asarray(audio_data)
+    if audio_data.ndim > 1:
+        audio_data = audio_data.mean(axis=1, dtype=plan.dtype)
+    audio_data = audio_data[:plan.max_samples].astype(plan.dtype, copy=True)
+
+    if plan.auto_normalize:
+        normalize_loudness(audio_data, plan.sample_rate, plan.record_loudness, plan.clip_ceiling,
+                           plan.limiter_lookahead, plan.limiter_release, plan.block_size)
+    return audio_data
+
+
+def resample_envelope(waveform_data, length, plan):
+    """Stretch graph data to `length` samples using the plan's resampler"""
+    waveform_data = np.asarray(waveform_data, dtype=np.float64)
+    if plan.resampler == "fft":
+        from scipy import signal
+        return signal.resample(waveform_data, length).astype(plan.dtype, copy=False)
+
+    # Interpolated one block at a time, so the only full-length array is the float32 result
+    envelope = np.empty(length, dtype=plan.dtype)
+    points = np.arange(len(waveform_data))
+    scale = (len(waveform_data) - 1) / max(length - 1, 1)
+    for start in range(0, length, plan.block_size):
+        positions = np.arange(start, min(start + plan.block_size, length), dtype=np.float64)
+        positions *= scale
+        envelope[start:start + len(positions)] = np.interp(positions, points, waveform_data)
+    return envelope
+
+
+def finish_output(audio_data, plan):
+    """Normalize modulated audio to plan.output_loudness and limit it to the clip ceiling, in place
+
+    The loudness is measured in one pass. The gain is then applied in the
+    limiter's pass, so the audio is rescaled only once. Either step can be
+    turned off (auto_normalize, prevent_clipping).
+    """
+    gain = 1.0
+    if plan.auto_normalize:
+        loudness = integrated_loudness(audio_data, plan.sample_rate, plan.block_size)
+        if np.isfinite(loudness):
+            gain = 10.0 ** ((plan.output_loudness - loudness) / 20.0)
+    if plan.prevent_clipping:
+        limit(audio_data, plan.sample_rate, plan.clip_ceiling, plan.limiter_lookahead, plan.limiter_release,
+              plan.block_size, out=audio_data, gain=gain)
+    elif gain != 1.0:
+        audio_data *= plan.dtype.type(gain)
+    return audio_data
+
+
+def apply_waveform_modulation(audio_data, waveform_data, plan):
+    """Apply the graph data as an amplitude envelope, reusing one output buffer"""
+    if audio_data is None or len(audio_data) == 0:
+        return None
+
+    envelope = resample_envelope(waveform_data, len(audio_data), plan)
+    peak = np.max(np.abs(envelope))
+    if peak > 0:
+        envelope *= plan.modulation_strength / peak
+    envelope += 1
+
+    # The envelope buffer becomes the output so no further full-length copies are made
+    np.multiply(envelope, audio_data, out=envelope, casting="unsafe")
+
+    return finish_output(envelope, plan)
+
+
+def lowpass_sos(cutoff, q, sample_rate):
+    """Low-pass biquads (RBJ cookbook) for arrays of cutoffs and Qs, as (n, 6) second-order sections"""
+    w0 = 2 * np.pi * np.clip(cutoff, 1.0, 0.49 * sample_rate) / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+    a0 = 1 + alpha
+    b1 = (1 - cos_w0) / a0
+    return np.stack([b1 / 2, b1, b1 / 2, np.ones_like(a0), -2 * cos_w0 / a0, (1 - alpha) / a0], axis=1)
+
+
+def filter_sweep(waveform_data, blocks, block_size, length, plan):
+    """One low-pass section per block, with the cutoff or Q following the data at the block centre
+
+    The data is interpolated to block centres and mapped log-linearly onto
+    the configured range before the coefficients are designed. Interpolating
+    the parameter rather than the coefficients keeps every section stable.
+    """
+    waveform_data = np.asarray(waveform_data, dtype=np.float64)
+    centres = np.minimum((np.arange(blocks) + 0.5) * block_size, length - 1)
+    values = np.interp(centres * ((len(waveform_data) - 1) / max(length - 1, 1)),
+                       np.arange(len(waveform_data)), waveform_data)
+    span = np.max(values) - np.min(values)
+    unit = (values - np.min(values)) / span if span > 0 else np.full(blocks, 0.5)
+
+    low_cutoff, high_cutoff = plan.filter_cutoff_range
+    low_q, high_q = plan.filter_q_range
+    if plan.filter_target == "cutoff":
+        cutoff, q = low_cutoff * (high_cutoff / low_cutoff) ** unit, np.full(blocks, low_q)
+    else:
+        cutoff, q = np.full(blocks, np.sqrt(low_cutoff * high_cutoff)), low_q * (high_q / low_q) ** unit
+    return lowpass_sos(cutoff, q, plan.sample_rate)
+
+
+def apply_filter_modulation(audio_data, waveform_data, plan):
+    """Sweep a resonant low-pass filter over the audio with the graph data
+
+    Filters `plan.filter_block` samples at a time with that block's section,
+    carrying the filter state (zi) into the next block. The audio is
+    processed once, in order, so the same loop works on a stream.
+    """
+    if audio_data is None or len(audio_data) == 0:
+        return None
+    from scipy import signal
+
+    block_size = plan.filter_block
+    blocks = -(-len(audio_data) // block_size)
+    sections = filter_sweep(waveform_data, blocks, block_size, len(audio_data), plan)
+
+    output = np.empty(len(audio_data), dtype=plan.dtype)
+    state = np.zeros((1, 2))
+    for index in range(blocks):
+        block = slice(index * block_size, (index + 1) * block_size)
+        output[block], state = signal.sosfilt(sections[index:index + 1], audio_data[block], zi=state)
+
+    return finish_output(output, plan)
+
+
+def modulate(audio_data, waveform_data, plan):
+    """Shape the recording with the graph data using the plan's modulation mode"""
+    if plan.modulation_mode == "filter":
+        return apply_filter_modulation(audio_data, waveform_data, plan)
+    return apply_waveform_modulation(audio_data, waveform_data, plan)
+
+
+def pan_positions(pan_data, length, plan):
+    """Stretch a data series to `length` samples and rescale it to speaker positions 0..channels-1"""
+    positions = resample_envelope(pan_data, length, plan)
+    low, high = np.min(positions), np.max(positions)
+    if high > low:
+        positions -= low
+        positions *= (plan.channels - 1) / (high - low)
+    else:
+        positions[:] = (plan.channels - 1) / 2
+    return positions
+
+
+def spatialize(audio_data, pan_data, plan):
+    """Pan mono audio across the plan's output channels, following a data series
+
+    Returns interleaved (samples, channels) audio; mono plans get the input
+    back unchanged. Speakers sit in a line at positions 0..channels-1 and
+    each sample is split between the two nearest with equal-power gains
+    cos(distance * pi / 2). The gains are computed in place in the output
+    buffer, so the only other allocation is the one-channel pan curve.
+    """
+    if audio_data is None or len(audio_data) == 0 or plan.channels == 1:
+        return audio_data
+
+    positions = pan_positions(pan_data, len(audio_data), plan)
+    speakers = np.arange(plan.channels, dtype=plan.dtype)
+    output = np.empty((len(audio_data), plan.channels), dtype=plan.dtype)
+    np.subtract(positions[:, None], speakers, out=output)
+    np.abs(output, out=output)
+    np.minimum(output, 1, out=output)
+    output *= plan.dtype.type(np.pi / 2)
+    np.cos(output, out=output)
+    output *= audio_data[:, None]
+    return output
+
+
+def encode_wav(audio_data, plan):
+    """Encode audio as WAV bytes at the plan's sample rate"""
+    import soundfile as sf
+
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, plan.sample_rate, format="wav")
+    return buffer.getvalue()
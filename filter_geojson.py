@@ -2,18 +2,411 @@
 """
 Filter GeoJSON file to only include King County zip codes
 This will significantly reduce the file size for easier GitHub upload
+
+Features are streamed one at a time and written compactly, so the filter
+runs in constant memory on statewide or national boundary files.
 """
 
+import argparse
+import itertools
 import json
 import os
+import time
 
-def filter_king_county_geojson():
-    """Filter the GeoJSON file to only include King County features"""
-    
-    input_file = "MapData/Zipcodes_for_King_County_and_Surrounding_Area_(Shorelines)___zipcode_shore_area.geojson"
-    output_file = "MapData/King_County_Zipcodes.geojson"
+import numpy as np
+
+from config import GEO_CONFIG
+
+INPUT_FILE = "MapData/Zipcodes_for_King_County_and_Surrounding_Area_(Shorelines)___zipcode_shore_area.geojson"
+OUTPUT_FILE = "MapData/King_County_Zipcodes.geojson"
+READ_CHUNK_SIZE = 1 << 20  # Bytes read from the input per refill
+METERS_PER_DEGREE = 111320  # Approximate ground distance of one degree of latitude
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+class _StreamReader:
+    """Buffered text reader that decodes one JSON value at a time"""
+
+    def __init__(self, f, chunk_size=READ_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _refill(self, min_size):
+        """Drop consumed text and read at least `min_size` more characters"""
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        text = self.f.read(max(self.chunk_size, min_size))
+        if not text:
+            self.eof = True
+        self.buffer += text
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._refill(0)
+
+    def expect(self, char):
+        """Consume `char`, raising ValueError if something else comes next"""
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' in GeoJSON stream, found '{self.peek()}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode and return the next JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # The value spans past the buffer; grow reads so huge features stay linear
+                self._refill(len(self.buffer) - self.pos)
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self._refill(0)
+                continue
+            self.pos = end
+            return value
+
+def iter_geojson_features(f, header=None):
+    """Yield the features of a FeatureCollection one at a time from an open file
+
+    Top-level members other than "features" (e.g. "crs", "bbox") are stored
+    in `header` when a dict is given: members before "features" by the time
+    the first feature is yielded, members after it once the last one has
+    been consumed.
+    """
+    reader = _StreamReader(f)
+    reader.expect('{')
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'features':
+            break
+        member = reader.value()
+        if header is not None:
+            header[key] = member
+        if reader.peek() != ',':
+            return  # No features array
+        reader.expect(',')
+
+    reader.expect('[')
+    if reader.peek() != ']':
+        while True:
+            yield reader.value()
+            if reader.peek() == ']':
+                break
+            reader.expect(',')
+    reader.expect(']')
+
+    while reader.peek() == ',':
+        reader.expect(',')
+        key = reader.value()
+        reader.expect(':')
+        member = reader.value()
+        if header is not None:
+            header[key] = member
+
+def _start_collection(dst, header):
+    """Write the top-level members read so far and open the features array; returns the member names written
+
+    A "bbox" is held back: it only holds for the written subset once
+    every feature is known, so _end_collection recomputes it.
+    """
+    header.pop('features', None)
+    header['type'] = 'FeatureCollection'
+    members = {key: value for key, value in header.items() if key != 'bbox'}
+    dst.write(json.dumps(members, separators=(',', ':'))[:-1] + ',"features":[')
+    return set(members)
+
+def _position_lists(coordinates):
+    """Yield each innermost list of positions in a GeoJSON coordinates array (a Point yields itself)"""
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (int, float)):
+        yield [coordinates]
+    elif coordinates[0] and isinstance(coordinates[0][0], (int, float)):
+        yield coordinates
+    else:
+        for part in coordinates:
+            yield from _position_lists(part)
+
+def _extend_bounds(bounds, geometry):
+    """Grow `bounds` [min x, min y, max x, max y] in place to cover a GeoJSON geometry"""
+    if not geometry:
+        return
+    if geometry.get('type') == 'GeometryCollection':
+        for part in geometry.get('geometries') or ():
+            _extend_bounds(bounds, part)
+        return
+    for positions in _position_lists(geometry.get('coordinates')):
+        points = np.array([position[:2] for position in positions], dtype=np.float64)
+        bounds[:2] = np.minimum(bounds[:2], points.min(axis=0))
+        bounds[2:] = np.maximum(bounds[2:], points.max(axis=0))
+
+def _end_collection(dst, header, written, bounds):
+    """Close the features array, then copy the top-level members read after it that are not in `written`
+
+    A source "bbox" is replaced by `bounds`, the extent of the features
+    actually written (in their written coordinate order), or dropped when
+    nothing was written.
+    """
+    trailing = ''.join(f',{json.dumps(key)}:{json.dumps(value, separators=(",", ":"))}'
+                       for key, value in header.items() if key not in written and key != 'bbox')
+    if 'bbox' in header and np.all(np.isfinite(bounds)):
+        trailing += f',"bbox":{json.dumps(bounds.tolist())}'
+    dst.write(']' + trailing + '}')
+
+def _new_bounds():
+    """Empty [min x, min y, max x, max y] bounds for _extend_bounds"""
+    return np.array([np.inf, np.inf, -np.inf, -np.inf])
+
+def property_predicate(name, value):
+    """Return a predicate selecting features whose property `name` equals `value`
+
+    Command-line values are strings, so a value that reads as a JSON number,
+    boolean or null (e.g. "98001", "true") also matches properties holding
+    that typed value. A JSON-quoted value ('"98001"') matches only the string.
+    """
+    values = [value]
+    if isinstance(value, str):
+        try:
+            typed = json.loads(value)
+        except ValueError:
+            typed = value
+        if isinstance(typed, str):
+            values = [typed]
+        elif not isinstance(typed, (list, dict)):
+            values.append(typed)
+
+    def predicate(feature):
+        found = (feature.get('properties') or {}).get(name)
+        # True == 1 in Python, so booleans only match booleans
+        return any(found == v and isinstance(found, bool) == isinstance(v, bool) for v in values)
+    return predicate
+
+def stream_filter_geojson(input_file, output_file, predicate):
+    """Copy features matching `predicate` into a compact FeatureCollection, one at a time
+
+    Returns (features read, features written, elapsed seconds).
+    """
+    total = kept = 0
+    start = time.perf_counter()
+    header = {}
+
+    with open(input_file, 'r', encoding='utf-8') as src, open(output_file, 'w', encoding='utf-8') as dst:
+        features = iter_geojson_features(src, header)
+        first_feature = next(features, None)
+
+        # Header members are known once the features array has been reached
+        written = _start_collection(dst, header)
+        bounds = _new_bounds()
+
+        if first_feature is not None:
+            features = itertools.chain([first_feature], features)
+        for feature in features:
+            total += 1
+            if predicate(feature):
+                if kept:
+                    dst.write(',')
+                dst.write(json.dumps(feature, separators=(',', ':')))
+                _extend_bounds(bounds, feature.get('geometry'))
+                kept += 1
+        _end_collection(dst, header, written, bounds)
+
+    return total, kept, time.perf_counter() - start
+
+def zoom_tolerance(zoom, pixel_tolerance=None):
+    """Return the simplification tolerance in degrees for a web map zoom level"""
+    pixel_tolerance = GEO_CONFIG["pixel_tolerance"] if pixel_tolerance is None else pixel_tolerance
+    return pixel_tolerance * 360.0 / (256 * 2 ** zoom)
+
+def _segment_distances(points, start, end):
+    """Distance from each point to the segment start-end"""
+    direction = end - start
+    length_sq = direction @ direction
+    if length_sq == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ direction / length_sq, 0, 1)
+    return np.hypot(*(points - start - t[:, None] * direction).T)
+
+def simplify_line(points, tolerance):
+    """Douglas-Peucker simplification of a polyline
+
+    Returns a mask of the points to keep and the largest distance between a
+    dropped point and the simplified line.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    deviation = 0.0
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _segment_distances(points[first + 1:last], points[first], points[last])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+        else:
+            deviation = max(deviation, float(distances[farthest]))
+    return keep, deviation
+
+def simplify_ring(ring, tolerance, precision):
+    """Simplify and quantize a closed ring; returns (ring, deviation) or (None, 0) if it collapses"""
+    ring = np.asarray(ring, dtype=np.float64)[:, :2]
+    if len(ring) < 3:
+        return None, 0.0
+    if not np.array_equal(ring[0], ring[-1]):
+        ring = np.vstack((ring, ring[:1]))
+
+    deviation = 0.0
+    if tolerance > 0:
+        # Split at the vertex farthest from the start so neither half is a closed loop
+        split = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+        if split == 0:
+            return None, 0.0
+        keep_head, deviation_head = simplify_line(ring[:split + 1], tolerance)
+        keep_tail, deviation_tail = simplify_line(ring[split:], tolerance)
+        ring = ring[np.concatenate((keep_head, keep_tail[1:]))]
+        deviation = max(deviation_head, deviation_tail)
+
+    quantized = np.round(ring, precision)
+    deviation += float(np.max(np.hypot(*(quantized - ring).T)))
+    # Rounding can merge neighbouring vertices
+    distinct = np.concatenate(([True], np.any(np.diff(quantized, axis=0) != 0, axis=1)))
+    quantized = quantized[distinct]
+    if len(quantized) < 4:
+        return None, 0.0
+    return quantized, deviation
+
+def optimize_geometry(geometry, tolerance, precision, leaflet_order=False):
+    """Simplify, quantize and optionally swap a (Multi)Polygon geometry
+
+    Returns (geometry, vertices in, vertices out, max deviation in degrees).
+    Collapsed holes and parts are dropped; if every part collapses the
+    geometry is only quantized.
+    """
+    if not geometry or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+        return geometry, 0, 0, 0.0
+
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    vertices_in = sum(len(ring) for polygon in polygons for ring in polygon)
+
+    for current_tolerance in (tolerance, 0.0):
+        optimized, vertices_out, deviation = [], 0, 0.0
+        for polygon in polygons:
+            rings = []
+            for ring_index, ring in enumerate(polygon):
+                simplified, ring_deviation = simplify_ring(ring, current_tolerance, precision)
+                if simplified is None:
+                    if ring_index == 0:
+                        break  # Exterior collapsed, drop the whole part
+                    continue
+                if leaflet_order:
+                    simplified = simplified[:, ::-1]
+                rings.append(simplified.tolist())
+                vertices_out += len(simplified)
+                deviation = max(deviation, ring_deviation)
+            if rings:
+                optimized.append(rings)
+        if optimized:
+            break
+
+    if not optimized:
+        return None, vertices_in, 0, 0.0
+    if len(optimized) == 1:
+        return {"type": "Polygon", "coordinates": optimized[0]}, vertices_in, vertices_out, deviation
+    return {"type": "MultiPolygon", "coordinates": optimized}, vertices_in, vertices_out, deviation
+
+def stream_optimize_geojson(input_file, output_file, tolerance, precision, leaflet_order=False):
+    """Write an optimized copy of a FeatureCollection, one feature at a time
+
+    Returns (vertices in, vertices out, max deviation in degrees).
+    """
+    vertices_in = vertices_out = 0
+    max_deviation = 0.0
+    header = {}
+
+    with open(input_file, 'r', encoding='utf-8') as src, open(output_file, 'w', encoding='utf-8') as dst:
+        features = iter_geojson_features(src, header)
+        first_feature = next(features, None)
+
+        if leaflet_order:
+            # Non-standard member telling the map the pairs are already [lat, lng]
+            header['coordinateOrder'] = 'latlng'
+        members = _start_collection(dst, header)
+        bounds = _new_bounds()
+
+        written = 0
+        if first_feature is not None:
+            features = itertools.chain([first_feature], features)
+        for feature in features:
+            geometry, n_in, n_out, deviation = optimize_geometry(
+                feature.get('geometry'), tolerance, precision, leaflet_order
+            )
+            vertices_in += n_in
+            vertices_out += n_out
+            max_deviation = max(max_deviation, deviation)
+            if geometry is None:
+                continue
+            feature['geometry'] = geometry
+            if written:
+                dst.write(',')
+            dst.write(json.dumps(feature, separators=(',', ':')))
+            _extend_bounds(bounds, geometry)
+            written += 1
+        _end_collection(dst, header, members, bounds)
+
+    return vertices_in, vertices_out, max_deviation
+
+def simplified_path(source_file, zoom):
+    """Return the path of the simplified variant of `source_file` for a zoom level"""
+    root, extension = os.path.splitext(source_file)
+    return f"{root}.z{zoom}{extension}"
+
+def build_simplified_boundaries(source_file=OUTPUT_FILE, zooms=None, precision=None, leaflet_order=None):
+    """Write one simplified, quantized boundary file per zoom level and report the savings"""
+    zooms = GEO_CONFIG["simplify_zooms"] if zooms is None else zooms
+    precision = GEO_CONFIG["coordinate_precision"] if precision is None else precision
+    leaflet_order = GEO_CONFIG["leaflet_order"] if leaflet_order is None else leaflet_order
+
+    if not os.path.exists(source_file):
+        print(f"❌ Error: Boundary file not found: {source_file}")
+        return False
+
+    source_size = os.path.getsize(source_file)
+    print(f"\n✂️  Simplifying {source_file} ({source_size / 1024:.0f} KB)")
+    for zoom in zooms:
+        tolerance = zoom_tolerance(zoom)
+        output_file = simplified_path(source_file, zoom)
+        vertices_in, vertices_out, deviation = stream_optimize_geojson(
+            source_file, output_file, tolerance, precision, leaflet_order
+        )
+        size = os.path.getsize(output_file)
+        print(f"   z{zoom}: {vertices_in:,} → {vertices_out:,} vertices, "
+              f"{size / 1024:.0f} KB ({(1 - size / source_size) * 100:.1f}% smaller), "
+              f"max deviation {deviation:.6f}° (~{deviation * METERS_PER_DEGREE:.0f} m) → {output_file}")
+    return True
+
+def filter_king_county_geojson(input_file=INPUT_FILE, output_file=OUTPUT_FILE,
+                               property_name='COUNTY_NAME', property_value='King County'):
+    """Filter the GeoJSON file to only include features with a matching property"""
     
-    print("🗺️  Filtering GeoJSON file to King County only...")
+    print(f"🗺️  Filtering GeoJSON file to {property_name} = {property_value}...")
     print(f"📁 Input: {input_file}")
     print(f"📁 Output: {output_file}")
     
@@ -23,31 +416,13 @@ def filter_king_county_geojson():
         return False
     
     try:
-        # Read the original GeoJSON file
-        print("📖 Reading GeoJSON file...")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        
-        print(f"📊 Original features: {len(geojson_data['features'])}")
-        
-        # Filter to only King County features
-        king_county_features = []
-        for feature in geojson_data['features']:
-            if feature.get('properties', {}).get('COUNTY_NAME') == 'King County':
-                king_county_features.append(feature)
-        
-        print(f"📊 King County features: {len(king_county_features)}")
+        print("📖 Streaming features...")
+        total, kept, elapsed = stream_filter_geojson(
+            input_file, output_file, property_predicate(property_name, property_value)
+        )
         
-        # Create new GeoJSON with only King County features
-        filtered_geojson = {
-            "type": "FeatureCollection",
-            "features": king_county_features
-        }
-        
-        # Write the filtered GeoJSON
-        print("💾 Writing filtered GeoJSON file...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(filtered_geojson, f, indent=2)
+        print(f"📊 Original features: {total}")
+        print(f"📊 Matching features: {kept}")
         
         # Get file sizes
         original_size = os.path.getsize(input_file) / (1024 * 1024)  # MB
@@ -55,7 +430,10 @@ def filter_king_county_geojson():
         
         print(f"📏 Original file size: {original_size:.2f} MB")
         print(f"📏 Filtered file size: {filtered_size:.2f} MB")
-        print(f"📉 Size reduction: {((original_size - filtered_size) / original_size * 100):.1f}%")
+        if original_size > 0:
+            print(f"📉 Size reduction: {((original_size - filtered_size) / original_size * 100):.1f}%")
+        if elapsed > 0:
+            print(f"⚡ Throughput: {original_size / elapsed:.1f} MB/s, {total / elapsed:,.0f} features/s")
         
         print(f"✅ Successfully created: {output_file}")
         return True
@@ -97,13 +475,33 @@ def update_demo_html():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Stream-filter a GeoJSON FeatureCollection by a feature property")
+    parser.add_argument("--input", default=INPUT_FILE, help="source GeoJSON file")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="filtered GeoJSON file")
+    parser.add_argument("--where", default="COUNTY_NAME=King County", metavar="PROPERTY=VALUE",
+                        help="keep features whose property equals this value; numbers, true/false and null "
+                             "also match typed properties, quote the value as JSON to match only a string")
+    parser.add_argument("--simplify", action="store_true",
+                        help="also write simplified, quantized boundaries per zoom level")
+    parser.add_argument("--zooms", type=int, nargs="+", default=GEO_CONFIG["simplify_zooms"])
+    parser.add_argument("--precision", type=int, default=GEO_CONFIG["coordinate_precision"],
+                        help="decimal places kept for coordinates")
+    parser.add_argument("--geojson-order", action="store_true",
+                        help="keep [lng, lat] pairs instead of pre-swapping them for Leaflet")
+    args = parser.parse_args()
+    property_name, _, property_value = args.where.partition("=")
+    
     print("🚀 King County GeoJSON Filter")
     print("=" * 40)
     
     # Filter the GeoJSON file
-    if filter_king_county_geojson():
+    if filter_king_county_geojson(args.input, args.output, property_name, property_value):
         # Update demo.html
-        update_demo_html()
+        if args.output == OUTPUT_FILE:
+            update_demo_html()
+        
+        if args.simplify:
+            build_simplified_boundaries(args.output, args.zooms, args.precision, not args.geojson_order)
         
         print("\n🎉 Filtering complete!")
         print("📝 Next steps:")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Local render service for Data Notes
+
+Serves the demo like run_demo_server.py and adds a POST /render endpoint:
+clients send a recording (any format soundfile can read) with a dataset ID
+and get the waveform-modulated WAV back, rendered with the same engine plan
+as the Streamlit app. Renders run in a process pool. At most
+`render_processes + render_queue` renders are accepted at once; beyond that
+the service answers 503 with Retry-After, and a render that takes longer
+than `render_timeout` is answered with 504.
+
+    curl --data-binary @voice.wav -H "Content-Type: audio/wav" \\
+         "http://localhost:8001/render?dataset=sample" -o rendered.wav
+
+Dataset IDs: "sample" (the generated line graph), "sample-<seed>", or
+"zip-<code>" (store-type counts of a ZIP code from the SNAP aggregates).
+Add "&mode=filter" to sweep a low-pass filter instead of the volume.
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import errno
+import http.server
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from config import SERVER_CONFIG, SNAP_CONFIG
+from engine_plan import (
+    MODULATION_MODES, get_plan, generate_waveform_data, prepare_recording, modulate, spatialize, encode_wav,
+    with_sample_rate,
+)
+from run_demo_server import BoundedThreadingHTTPServer, CustomHTTPRequestHandler
+
+
+def parse_dataset_id(dataset_id):
+    """Split a dataset ID into (kind, argument), raising ValueError if it is not recognised"""
+    kind, _, argument = (dataset_id or '').partition('-')
+    if kind == 'sample' and (not argument or argument.isdigit()):
+        return kind, int(argument) if argument else None
+    if kind == 'zip' and argument.isdigit():
+        return kind, argument
+    raise ValueError(f"Unknown dataset '{dataset_id}', expected sample, sample-<seed> or zip-<code>")
+
+
+def load_dataset(dataset_id, plan):
+    """Return the data values used as the modulation envelope for a dataset ID"""
+    kind, argument = parse_dataset_id(dataset_id)
+    if kind == 'sample':
+        _, y = generate_waveform_data(plan, seed=argument)
+        return y
+
+    with open(SNAP_CONFIG["aggregates_path"], 'r', encoding='utf-8') as f:
+        zips = json.load(f)["zips"]
+    if argument not in zips:
+        raise ValueError(f"No SNAP data for ZIP code {argument}")
+    store_types = zips[argument]["storeTypes"]
+    return np.array([store_types.get(name, 0) for name in SNAP_CONFIG["store_type_instruments"]], dtype=np.float64)
+
+
+def render(recording, dataset_id, mode=None):
+    """Worker entry point: decode a recording, modulate it with a dataset and return WAV bytes"""
+    import soundfile as sf
+
+    plan = get_plan()
+    if mode and mode != plan.modulation_mode:
+        plan = dataclasses.replace(plan, modulation_mode=mode)
+    try:
+        audio_data, sample_rate = sf.read(io.BytesIO(recording), dtype=plan.dtype.name, always_2d=False)
+    except RuntimeError as e:
+        raise ValueError(f"Could not decode recording: {e}") from None
+    if len(audio_data) == 0:
+        raise ValueError("Recording is empty")
+
+    # Render at the recording's own rate so it keeps its duration and pitch
+    plan = with_sample_rate(plan, sample_rate)
+    audio_data = prepare_recording(audio_data, plan)
+    data = load_dataset(dataset_id, plan)
+    modulated = spatialize(modulate(audio_data, data, plan), data, plan)
+    return encode_wav(modulated, plan)
+
+
+def check_sample_rates(rates=(22050, 48000), seconds=1.0):
+    """Render a tone at each sample rate and check the result keeps its rate and duration (True if all do)"""
+    import soundfile as sf
+
+    passed = True
+    for rate in rates:
+        tone = 0.3 * np.sin(2 * np.pi * 220.0 * np.arange(int(seconds * rate)) / rate)
+        buffer = io.BytesIO()
+        sf.write(buffer, tone, rate, format='WAV')
+        rendered, rendered_rate = sf.read(io.BytesIO(render(buffer.getvalue(), 'sample')))
+        duration = len(rendered) / rendered_rate
+        ok = rendered_rate == rate and abs(duration - seconds) <= 1.0 / rate
+        passed &= ok
+        print(f"{'✅' if ok else '❌'} {rate} Hz upload → {rendered_rate} Hz, {duration:.4f}s (expected {seconds:g}s)")
+    return passed
+
+
+class RenderPool:
+    """Process pool that accepts a bounded number of renders and rejects the rest"""
+
+    def __init__(self, processes=None, queue_size=8):
+        self.processes = processes or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.processes)
+        self.capacity = self.processes + queue_size
+        self._slots = threading.BoundedSemaphore(self.capacity)
+
+    def submit(self, *args):
+        """Start a render, or return None when the pool and its queue are full"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self.executor.submit(render, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # A slot stays taken until the render actually finishes, even if the request timed out
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RenderRequestHandler(CustomHTTPRequestHandler):
+    """Demo file handler with a POST /render endpoint backed by a RenderPool"""
+
+    render_timeout = SERVER_CONFIG["render_timeout"]
+    max_body_bytes = SERVER_CONFIG["render_max_bytes"]
+
+    def do_OPTIONS(self):
+        # CORS preflight for clients served from another origin
+        self.send_response(http.server.HTTPStatus.NO_CONTENT)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/render':
+            self.send_error(http.server.HTTPStatus.NOT_FOUND, "Unknown endpoint")
+            return
+
+        query = parse_qs(url.query)
+        dataset_id = query.get('dataset', ['sample'])[0]
+        mode = query.get('mode', [None])[0]
+        try:
+            parse_dataset_id(dataset_id)
+        except ValueError as e:
+            self.send_error(http.server.HTTPStatus.BAD_REQUEST, str(e))
+            return
+        if mode is not None and mode not in MODULATION_MODES:
+            self.send_error(http.server.HTTPStatus.BAD_REQUEST,
+                            f"Unknown mode '{mode}', expected one of {', '.join(MODULATION_MODES)}")
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.send_error(http.server.HTTPStatus.LENGTH_REQUIRED)
+            return
+        if length <= 0:
+            self.send_error(http.server.HTTPStatus.BAD_REQUEST, "Request body must contain a recording")
+            return
+        if length > self.max_body_bytes:
+            self.send_error(http.server.HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"Recordings are limited to {self.max_body_bytes} bytes")
+            return
+        recording = self.rfile.read(length)
+
+        future = self.server.render_pool.submit(recording, dataset_id, mode)
+        if future is None:
+            self.send_response(http.server.HTTPStatus.SERVICE_UNAVAILABLE)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        try:
+            data = future.result(timeout=self.render_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.send_error(http.server.HTTPStatus.GATEWAY_TIMEOUT, "Render timed out")
+            return
+        except ValueError as e:
+            self.send_error(http.server.HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except Exception as e:
+            self.log_error("Render failed: %s", e)
+            self.send_error(http.server.HTTPStatus.INTERNAL_SERVER_ERROR, "Render failed")
+            return
+
+        self.send_response(http.server.HTTPStatus.OK)
+        self.send_header('Content-Type', 'audio/wav')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the demo with a POST /render endpoint")
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["render_port"], help="port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVER_CONFIG["workers"],
+                        help="maximum HTTP requests handled at the same time")
+    parser.add_argument("--processes", type=int, default=SERVER_CONFIG["render_processes"],
+                        help="render worker processes (default: one per CPU)")
+    parser.add_argument("--queue", type=int, default=SERVER_CONFIG["render_queue"],
+                        help="renders allowed to wait for a worker before answering 503")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    parser.add_argument("--check", action="store_true",
+                        help="check that uploads at other sample rates keep their duration, then exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_sample_rates() else 1)
+
+    # Paths in config.py are relative to the project root
+    os.chdir(Path(__file__).parent.absolute())
+
+    render_pool = RenderPool(args.processes, args.queue)
+    try:
+        with BoundedThreadingHTTPServer(("", args.port), RenderRequestHandler, args.workers, args.quiet) as httpd:
+            httpd.render_pool = render_pool
+            print(f"🎛️  Render service at http://localhost:{args.port}/render")
+            print(f"⚙️  {render_pool.processes} render processes, "
+                  f"up to {render_pool.capacity} renders accepted before answering 503")
+            print("\n⏹️  Press Ctrl+C to stop the server")
+            print("=" * 50)
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped by user")
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            print(f"❌ Port {args.port} is already in use. Use --port to choose another one.")
+        else:
+            print(f"❌ Error starting server: {e}")
+        sys.exit(1)
+    finally:
+        render_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ def main():
         
         # Run streamlit with the app
         subprocess.run([
-            sys.executable, "-m", "streamlit", "run", "app_realtime.py",
+            sys.executable, "-m", "streamlit", "run", "app_unified.py",
             "--server.port", "8501",
             "--server.address", "localhost",
             "--browser.gatherUsageStats", "false"
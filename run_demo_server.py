@@ -2,77 +2,464 @@
 """
 Simple HTTP server for running the Data Notes demo locally.
 This script starts a local web server to serve the demo.html file and related assets.
+
+Requests are handled on a bounded pool of threads so a slow download of a
+large WAV stem does not block other clients, and text assets (HTML, CSV,
+JSON/GeoJSON) are sent gzip- or brotli-compressed when the browser accepts
+it. Compressed variants are built once per file version and kept in memory.
+
+Files carry strong ETags derived from their content, so repeat visits are
+answered with 304 Not Modified, and byte-range requests (206) let the
+browser seek in or resume the large WAV stems.
 """
 
+import argparse
+import collections
+import email.utils
+import errno
+import gzip
+import hashlib
 import http.server
-import socketserver
+import io
+import mimetypes
 import os
+import re
 import sys
+import threading
 import webbrowser
 from pathlib import Path
 
+from config import SERVER_CONFIG
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
+
+
+# MIME types for demo assets the standard library does not know or guesses differently
+DEMO_TYPES = {
+    '.csv': 'text/csv',
+    '.wav': 'audio/wav',
+    '.geojson': 'application/geo+json',
+    '.topojson': 'application/json',
+}
+
+
+def guess_demo_type(path):
+    """Return the Content-Type the demo server sends for `path`"""
+    extension = os.path.splitext(str(path))[1].lower()
+    return DEMO_TYPES.get(extension) or mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} from an Accept-Encoding header"""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def choose_encoding(header):
+    """Pick the best supported content coding for a request ('br', 'gzip' or None)"""
+    codings = parse_accept_encoding(header)
+    for coding in ('br', 'gzip') if brotli else ('gzip',):
+        if codings.get(coding, codings.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding):
+    """Compress bytes with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressionCache:
+    """Compressed file variants keyed by path, version and coding, evicted least recently used"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, stat, encoding):
+        """Return the compressed contents of `path`, compressing on first use"""
+        key = (path, stat.st_mtime_ns, stat.st_size, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Compress outside the lock so other requests are not held up
+        with open(path, 'rb') as f:
+            data = compress(f.read(), encoding)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+
+class ETagCache:
+    """Content-hash ETags keyed by path and file version, so each version is hashed once"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, stat):
+        """Return the hex content hash of `path`"""
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        tag = digest.hexdigest()
+
+        with self._lock:
+            self._entries[key] = tag
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tag
+
+
+class RangeFile:
+    """Read-only view of `length` bytes of an open file, starting at `start`"""
+
+    def __init__(self, f, start, length):
+        self.f = f
+        self.remaining = length
+        f.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def parse_range(header, size):
+    """Parse a single-range `bytes=` header into (start, end) inclusive
+
+    Returns None when the header should be ignored (absent, malformed or
+    multiple ranges, answered with the full file) and False when the range
+    cannot be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[6:].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start, end = max(0, size - int(last)), size - 1  # Suffix range: the last N bytes
+        else:
+            return None
+    except ValueError:
+        return None
+    if start > end and first and last:
+        return None
+    if start >= size or size == 0:
+        return False
+    return start, min(end, size - 1)
+
+
+IMMUTABLE_PATTERN = re.compile(SERVER_CONFIG["immutable_pattern"])
+
+
+def file_cache_headers(path, etag, stat, compressible):
+    """Validator and caching headers shared by 200, 206 and 304 responses"""
+    headers = [
+        ('ETag', etag),
+        ('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True)),
+        ('Accept-Ranges', 'bytes'),
+    ]
+    if IMMUTABLE_PATTERN.search(os.path.basename(path)):
+        # The name changes whenever the content does, so it never needs revalidating
+        headers.append(('Cache-Control', f'public, max-age={SERVER_CONFIG["immutable_max_age"]}, immutable'))
+    else:
+        # Cached copies are revalidated with If-None-Match and usually answered with 304
+        headers.append(('Cache-Control', 'no-cache'))
+    if compressible:
+        headers.append(('Vary', 'Accept-Encoding'))
+    return headers
+
+
+def not_modified(request_headers, etag, stat):
+    """Return True when the client's cached copy matches (If-None-Match, else If-Modified-Since)"""
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match is not None:
+        candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+        # Weak comparison, as required for If-None-Match
+        return '*' in candidates or etag in [c[2:] if c.startswith('W/') else c for c in candidates]
+
+    if_modified_since = request_headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        return since is not None and since.timestamp() >= int(stat.st_mtime)
+    return False
+
+
+class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler with CORS headers, demo MIME types, compression, ranges and ETags"""
+
+    compression_cache = CompressionCache(SERVER_CONFIG["compress_cache_bytes"])
+    etag_cache = ETagCache()
+    compress_types = frozenset(SERVER_CONFIG["compress_types"])
+    compress_min_bytes = SERVER_CONFIG["compress_min_bytes"]
+    timeout = 30  # Seconds an idle connection may hold a worker
+
+    def end_headers(self):
+        # Add CORS headers to allow local file access
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        super().end_headers()
+
+    def guess_type(self, path):
+        # Ensure proper MIME types for our files
+        return DEMO_TYPES.get(os.path.splitext(path)[1].lower()) or super().guess_type(path)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) or not os.path.isfile(path):
+            return super().send_head()
+
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(http.server.HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            stat = os.fstat(f.fileno())
+            content_type = self.guess_type(path)
+            compressible = content_type in self.compress_types and stat.st_size >= self.compress_min_bytes
+            range_header = self.headers.get('Range')
+
+            # Ranges address the identity bytes, so ranged requests are never compressed
+            encoding = None
+            if compressible and not range_header:
+                encoding = choose_encoding(self.headers.get('Accept-Encoding'))
+
+            tag = self.etag_cache.get(path, stat)
+            etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+            cache_headers = file_cache_headers(path, etag, stat, compressible)
+
+            if not_modified(self.headers, etag, stat):
+                f.close()
+                self.send_response(http.server.HTTPStatus.NOT_MODIFIED)
+                for name, value in cache_headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                return None
+
+            if encoding:
+                data = self.compression_cache.get(path, stat, encoding)
+                f.close()
+                self.send_response(http.server.HTTPStatus.OK)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in cache_headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                return io.BytesIO(data)
+
+            # If-Range: only honour the range when the client's copy is still current
+            if_range = self.headers.get('If-Range')
+            byte_range = parse_range(range_header, stat.st_size) if not if_range or if_range == etag else None
+            if byte_range is False:
+                f.close()
+                self.send_response(http.server.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{stat.st_size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+
+            if byte_range:
+                start, end = byte_range
+                self.send_response(http.server.HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{stat.st_size}')
+                body = RangeFile(f, start, end - start + 1)
+                length = end - start + 1
+            else:
+                self.send_response(http.server.HTTPStatus.OK)
+                body, length = f, stat.st_size
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(length))
+            for name, value in cache_headers:
+                self.send_header(name, value)
+            self.end_headers()
+            return body
+        except Exception:
+            f.close()
+            raise
+
+    def log_message(self, format, *args):
+        # Keep the console readable when a classroom loads the demo at once
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class BoundedThreadingHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server that handles at most `workers` requests at the same time
+
+    Connections beyond the limit wait in the listen backlog instead of
+    spawning unbounded threads.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers, quiet=False):
+        self.quiet = quiet
+        self._slots = threading.BoundedSemaphore(workers)
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+def precompress(root, encodings=None):
+    """Warm the compression cache for every compressible file under `root`"""
+    encodings = encodings or (('br', 'gzip') if brotli else ('gzip',))
+    handler = CustomHTTPRequestHandler
+    count = 0
+    for path in Path(root).rglob('*'):
+        if not path.is_file() or any(part.startswith('.') for part in path.relative_to(root).parts):
+            continue
+        stat = path.stat()
+        if stat.st_size < handler.compress_min_bytes:
+            continue
+        if guess_demo_type(path) not in handler.compress_types:
+            continue
+        for encoding in encodings:
+            handler.compression_cache.get(str(path), stat, encoding)
+        count += 1
+    return count
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Serve the Data Notes demo locally")
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"], help="port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVER_CONFIG["workers"],
+                        help="maximum requests handled at the same time")
+    parser.add_argument("--precompress", action="store_true",
+                        help="compress text assets at startup instead of on first request")
+    parser.add_argument("--asyncio", action="store_true",
+                        help="serve from a single asyncio event loop with keep-alive and sendfile")
+    parser.add_argument("--max-connections", type=int, default=SERVER_CONFIG["max_connections"],
+                        help="open connections allowed in --asyncio mode")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    parser.add_argument("--no-browser", action="store_true", help="do not open a browser window")
+    args = parser.parse_args()
+
     # Get the directory where this script is located
     script_dir = Path(__file__).parent.absolute()
-    
+
     # Change to the script directory
     os.chdir(script_dir)
-    
+
     # Set up the server
-    PORT = 8000
-    
-    # Create a custom handler that serves files with proper MIME types
-    class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-        def end_headers(self):
-            # Add CORS headers to allow local file access
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            super().end_headers()
-        
-        def guess_type(self, path):
-            # Ensure proper MIME types for our files
-            if path.endswith('.csv'):
-                return 'text/csv'
-            elif path.endswith('.wav'):
-                return 'audio/wav'
-            return super().guess_type(path)
-    
+    PORT = args.port
+
     try:
-        with socketserver.TCPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
+        if args.precompress:
+            count = precompress(script_dir)
+            print(f"🗜️  Precompressed {count} files "
+                  f"({CustomHTTPRequestHandler.compression_cache.size / 1024:.0f} KB in memory)")
+
+        def announce(mode):
             print(f"🚀 Starting local server at http://localhost:{PORT}")
             print(f"📁 Serving files from: {script_dir}")
+            print(f"{mode}, compression: {'brotli + gzip' if brotli else 'gzip'}")
             print(f"🌐 Open your browser to: http://localhost:{PORT}/demo.html")
             print("\n📋 Available files:")
-            
+
             # List available files
             for file_path in script_dir.glob("*"):
                 if file_path.is_file() and not file_path.name.startswith('.'):
                     print(f"   - {file_path.name}")
-            
+
             print("\n⏹️  Press Ctrl+C to stop the server")
             print("=" * 50)
-            
+
             # Try to open the browser automatically
-            try:
-                webbrowser.open(f'http://localhost:{PORT}/demo.html')
-                print("🌐 Browser opened automatically!")
-            except:
-                print("⚠️  Could not open browser automatically. Please open manually.")
-            
+            if not args.no_browser:
+                try:
+                    webbrowser.open(f'http://localhost:{PORT}/demo.html')
+                    print("🌐 Browser opened automatically!")
+                except:
+                    print("⚠️  Could not open browser automatically. Please open manually.")
+
+        if args.asyncio:
+            from async_demo_server import run_async_server
+
+            run_async_server(PORT, script_dir, args.max_connections, args.quiet,
+                             on_ready=lambda: announce(f"⚡ asyncio event loop, up to {args.max_connections} connections"))
+            return
+
+        with BoundedThreadingHTTPServer(("", PORT), CustomHTTPRequestHandler, args.workers, args.quiet) as httpd:
+            announce(f"🧵 Handling up to {args.workers} requests at once")
+
             # Start the server
             httpd.serve_forever()
-            
+
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except OSError as e:
-        if e.errno == 48:  # Address already in use
+        if e.errno == errno.EADDRINUSE:
             print(f"❌ Port {PORT} is already in use. Please try a different port or stop the existing server.")
-            print("💡 You can specify a different port by modifying the PORT variable in this script.")
+            print("💡 You can specify a different port with --port.")
         else:
             print(f"❌ Error starting server: {e}")
+        sys.exit(1)
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
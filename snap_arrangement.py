@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Render the whole SNAP music map as one county-wide arrangement
+
+Clicking ZIP codes in demo.html plays one ZIP at a time. This script sweeps
+across King County instead: the ZIP codes from the SNAP aggregates are
+ordered geographically (west to east, north to south, ...) or by a metric
+(total stores or the count of one store type), and each ZIP plays its
+instrument layers for MUSIC_CONFIG["arrangement_bars_per_zip"] bars, on
+95 BPM bar boundaries. Louder ZIPs have more stores.
+
+Every event is added into one preallocated mixdown buffer through a reused
+scratch buffer, so rendering a few hundred ZIP codes takes seconds. The
+mixdown WAV is written with an event timeline JSON (ZIP, bar, start/end
+time and instrument gains per event) for syncing a map animation.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import MUSIC_CONFIG, SNAP_CONFIG, project_path
+from stem_assets import bar_frames, trim_to_bars
+from stem_premix import build_layers
+
+# Geographic sweep directions and the coordinate sort key for each
+DIRECTIONS = {
+    "west-east": lambda entry: entry["coordinates"]["lng"],
+    "east-west": lambda entry: -entry["coordinates"]["lng"],
+    "south-north": lambda entry: entry["coordinates"]["lat"],
+    "north-south": lambda entry: -entry["coordinates"]["lat"],
+}
+
+
+def order_key(order):
+    """Sort key for an order name: a direction, "stores" or a store type"""
+    if order in DIRECTIONS:
+        return DIRECTIONS[order]
+    if order == "stores":
+        return lambda entry: entry["totalStores"]
+    if order in SNAP_CONFIG["store_type_instruments"]:
+        return lambda entry: entry["storeTypes"].get(order, 0)
+    raise ValueError(f"Unknown order '{order}', expected one of {', '.join(DIRECTIONS)}, stores or a store type")
+
+
+def order_zips(zips, order, reverse=False):
+    """Return [(zip code, aggregate)] sorted by `order`; ties keep ZIP code order"""
+    key = order_key(order)
+    ordered = sorted(zips.items(), key=lambda item: (key(item[1]), item[0]))
+    return ordered[::-1] if reverse else ordered
+
+
+def plan_events(ordered, instruments, frames_per_bar, bars_per_zip, min_gain):
+    """One event per ZIP code: its bar slot, frame range and per-instrument gains
+
+    Event boundaries are rounded from the exact bar position, so bars never
+    drift however long the arrangement gets. The ZIP level rises linearly
+    from `min_gain` to 1.0 with its store count and is shared between its
+    layers by 1/sqrt(layers), as in stem_premix.premix().
+    """
+    most_stores = max((entry["totalStores"] for _, entry in ordered), default=0) or 1
+    events = []
+    for slot, (zip_code, entry) in enumerate(ordered):
+        bar = slot * bars_per_zip
+        present = [instrument for instrument in entry["instruments"] if instrument in instruments]
+        level = min_gain + (1.0 - min_gain) * entry["totalStores"] / most_stores
+        gain = level / np.sqrt(len(present)) if present else 0.0
+        events.append({
+            "zip": zip_code,
+            "bar": bar,
+            "startFrame": int(round(bar * frames_per_bar)),
+            "endFrame": int(round((bar + bars_per_zip) * frames_per_bar)),
+            "totalStores": entry["totalStores"],
+            "coordinates": entry["coordinates"],
+            "instruments": {instrument: round(float(gain), 4) for instrument in present},
+        })
+    return events
+
+
+def render_events(events, loops, fade_frames):
+    """Mix every event into one buffer and return it (float32 stereo)
+
+    Loops are indexed by absolute frame, so an instrument that carries on
+    into the next ZIP stays in phase, and the linear fade-out of one event
+    and the fade-in of the next sum to the new gain without a click.
+    """
+    if not events:
+        return np.zeros((0, 2), dtype=np.float32)
+    fade = max(1, fade_frames)
+    mix = np.zeros((events[-1]["endFrame"] + fade, 2), dtype=np.float32)
+    longest = max(event["endFrame"] - event["startFrame"] for event in events) + fade
+    scratch = np.empty((longest, 2), dtype=np.float32)
+    fade_in = np.linspace(0.0, 1.0, fade, endpoint=False, dtype=np.float32)[:, None]
+    fade_out = 1.0 - fade_in
+
+    # Tile each loop so any phase plus the longest event is a plain slice
+    tiled = {instrument: np.tile(loop, (int(np.ceil((len(loop) + longest) / len(loop))), 1))
+             for instrument, loop in loops.items()}
+
+    for event in events:
+        start = event["startFrame"]
+        length = event["endFrame"] - start + fade
+        segment = scratch[:length]
+        for instrument, gain in event["instruments"].items():
+            phase = start % len(loops[instrument])
+            np.multiply(tiled[instrument][phase:phase + length], gain, out=segment)
+            segment[:fade] *= fade_in
+            segment[-fade:] *= fade_out
+            mix[start:start + length] += segment
+    return mix
+
+
+def build_arrangement(order="west-east", reverse=False, output_path=None, bars_per_zip=None):
+    """Render the county-wide arrangement and its timeline; returns the timeline dict"""
+    import soundfile as sf
+
+    if output_path is None:
+        output_path = project_path(MUSIC_CONFIG["arrangement_path"])
+        timeline_path = project_path(MUSIC_CONFIG["arrangement_timeline_path"])
+    else:
+        timeline_path = os.path.splitext(output_path)[0] + ".json"
+    bars_per_zip = MUSIC_CONFIG["arrangement_bars_per_zip"] if bars_per_zip is None else bars_per_zip
+
+    with open(project_path(SNAP_CONFIG["aggregates_path"]), 'r', encoding='utf-8') as f:
+        zips = json.load(f)["zips"]
+    ordered = order_zips(zips, order, reverse)
+
+    layers, sample_rate, _ = build_layers()
+    if not layers:
+        print("❌ No stems found, nothing to arrange")
+        return None
+
+    start = time.perf_counter()
+    frames_per_bar = bar_frames(sample_rate)
+    loops = {instrument: trim_to_bars(layer, frames_per_bar)[0] for instrument, layer in layers.items()}
+    events = plan_events(ordered, loops, frames_per_bar, bars_per_zip, MUSIC_CONFIG["arrangement_min_gain"])
+    mix = render_events(events, loops, int(round(MUSIC_CONFIG["arrangement_fade"] * sample_rate)))
+
+    peak = float(np.max(np.abs(mix))) if mix.size else 0.0
+    normalization = MUSIC_CONFIG["premix_peak"] / peak if peak > MUSIC_CONFIG["premix_peak"] else 1.0
+    if normalization != 1.0:
+        mix *= normalization
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    sf.write(output_path, mix, sample_rate, subtype=MUSIC_CONFIG["premix_subtype"])
+
+    timeline = {
+        "bpm": MUSIC_CONFIG["bpm"],
+        "beatsPerBar": MUSIC_CONFIG["beats_per_bar"],
+        "barsPerZip": bars_per_zip,
+        "sampleRate": sample_rate,
+        "order": order + (" (reversed)" if reverse else ""),
+        "duration": round(len(mix) / sample_rate, 6),
+        "normalization": round(normalization, 4),
+        "events": [{
+            "zip": event["zip"],
+            "bar": event["bar"],
+            "start": round(event["startFrame"] / sample_rate, 6),
+            "end": round(event["endFrame"] / sample_rate, 6),
+            "totalStores": event["totalStores"],
+            "coordinates": event["coordinates"],
+            "instruments": event["instruments"],
+        } for event in events],
+    }
+    with open(timeline_path, 'w', encoding='utf-8') as f:
+        json.dump(timeline, f, indent=1)
+
+    layered = sum(len(event["instruments"]) for event in events)
+    print(f"🗺️  {len(events)} ZIP codes ordered {timeline['order']}, {layered} instrument events")
+    print(f"🎶 {timeline['duration']:.1f}s of audio rendered in {elapsed:.2f}s → {output_path}")
+    print(f"🕒 Timeline → {timeline_path}")
+    return timeline
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Render the SNAP music map as one county-wide arrangement")
+    parser.add_argument("--order", default="west-east",
+                        help=f"{', '.join(DIRECTIONS)}, stores, or a store type such as 'Supermarket'")
+    parser.add_argument("--reverse", action="store_true", help="reverse the order (e.g. most stores first)")
+    parser.add_argument("--bars-per-zip", type=int, default=None, help="bars each ZIP code plays for")
+    parser.add_argument("--output", default=None, help="mixdown WAV path (timeline JSON is written next to it)")
+    args = parser.parse_args()
+    if args.bars_per_zip is not None and args.bars_per_zip < 1:
+        parser.error("--bars-per-zip must be at least 1")
+
+    print("🎼 SNAP County Arrangement Renderer")
+    print("=" * 40)
+
+    try:
+        build_arrangement(args.order, args.reverse, args.output, args.bars_per_zip)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
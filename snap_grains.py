@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Sonify every SNAP retailer as a short synthesized note
+
+Each retailer row becomes one grain. Its store type sets the timbre
+(GRAIN_CONFIG["timbres"]), latitude sets the pitch on a C# minor pentatonic
+scale (south lowest), longitude sets the stereo pan (west left), and its
+position along the scan path (west to east, north to south, or outward
+from the centre) sets the onset time.
+
+Pitches are quantized to scale degrees, so every grain of one store type
+and degree shares one precomputed waveform. Grains are batched by that
+(type, degree) key. A dense batch has its onsets and pan gains summed into
+an impulse train with np.bincount, which is convolved once with the batch
+waveform. A sparse batch is scattered straight into the mix with np.add.at.
+Neither path loops over notes in Python, so a national-scale file of 100k+
+retailers renders in seconds.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from config import GRAIN_CONFIG, project_path
+from snap_store import SnapRetailerStore
+
+SCANS = ("west-east", "east-west", "south-north", "north-south", "radial")
+
+# A batch is scattered directly while grains × waveform frames stay below this many times
+# the frames it spans; denser batches are cheaper as one FFT convolution
+DIRECT_SUM_RATIO = 8
+DIRECT_SUM_CHUNK = 1 << 20  # Samples scattered per np.add.at call, bounding index memory
+
+
+def scale_frequencies(root_hz=None, scale=None, octaves=None):
+    """Frequencies of every scale degree over `octaves`, lowest first"""
+    root_hz = GRAIN_CONFIG["root_hz"] if root_hz is None else root_hz
+    scale = GRAIN_CONFIG["scale"] if scale is None else scale
+    octaves = GRAIN_CONFIG["octaves"] if octaves is None else octaves
+    semitones = (np.arange(octaves)[:, None] * 12 + np.asarray(scale)[None, :]).ravel()
+    return root_hz * 2.0 ** (semitones / 12.0)
+
+
+def grain_waveforms(timbre, frequencies, sample_rate, length):
+    """One note per frequency for a timbre, as a (degrees, frames) float32 array peaking at 1.0"""
+    t = np.arange(int(round(length * sample_rate))) / sample_rate
+    harmonics = np.asarray(timbre["harmonics"], dtype=np.float64)
+    partials = np.arange(1, len(harmonics) + 1)
+
+    # Sum harmonics for every degree at once; partials above Nyquist are dropped
+    phase = 2 * np.pi * frequencies[:, None, None] * partials[None, :, None] * t[None, None, :]
+    audible = (frequencies[:, None] * partials[None, :] < sample_rate / 2) * harmonics[None, :]
+    waves = np.einsum('dh,dht->dt', audible, np.sin(phase))
+
+    envelope = (1.0 - np.exp(-t / timbre["attack"])) * np.exp(-t / timbre["decay"])
+    release = max(1, len(t) // 10)
+    envelope[-release:] *= np.linspace(1.0, 0.0, release)  # End exactly at zero
+    waves *= envelope
+    peaks = np.max(np.abs(waves), axis=1, keepdims=True)
+    return (waves / np.where(peaks > 0, peaks, 1.0)).astype(np.float32)
+
+
+def unit_range(values):
+    """Rescale values to 0..1 over their finite range (all 0.5 if constant)"""
+    low, high = np.nanmin(values), np.nanmax(values)
+    if high <= low:
+        return np.full(len(values), 0.5)
+    return (values - low) / (high - low)
+
+
+def scan_position(lon, lat, scan):
+    """Position of each point along a scan path, 0 (first) to 1 (last)"""
+    x, y = unit_range(lon), unit_range(lat)
+    if scan == "west-east":
+        return x
+    if scan == "east-west":
+        return 1.0 - x
+    if scan == "south-north":
+        return y
+    if scan == "north-south":
+        return 1.0 - y
+    if scan == "radial":
+        return unit_range(np.hypot(x - 0.5, y - 0.5))
+    raise ValueError(f"Unknown scan '{scan}', expected one of {', '.join(SCANS)}")
+
+
+def plan_grains(lon, lat, type_codes, n_degrees, sample_rate, duration, scan):
+    """Onset frame, batch key and left/right gain for every retailer with coordinates
+
+    Batch keys are type_code * n_degrees + degree. Panning is equal-power,
+    so a grain is equally loud anywhere between the speakers.
+    """
+    valid = np.isfinite(lon) & np.isfinite(lat)
+    lon, lat, type_codes = lon[valid], lat[valid], type_codes[valid]
+
+    onsets = np.round(scan_position(lon, lat, scan) * duration * sample_rate).astype(np.int64)
+    degrees = np.round(unit_range(lat) * (n_degrees - 1)).astype(np.int64)
+    keys = type_codes.astype(np.int64) * n_degrees + degrees
+    angle = unit_range(lon) * (np.pi / 2)
+    return onsets, keys, np.cos(angle).astype(np.float32), np.sin(angle).astype(np.float32)
+
+
+def scatter_grains(mix, onsets, left, right, waveform):
+    """Add one waveform at every onset with np.add.at, a chunk of grains at a time"""
+    offsets = np.arange(len(waveform))
+    per_chunk = max(1, DIRECT_SUM_CHUNK // len(waveform))
+    for first in range(0, len(onsets), per_chunk):
+        chunk = slice(first, first + per_chunk)
+        frames = (onsets[chunk, None] + offsets).ravel()
+        np.add.at(mix[:, 0], frames, (left[chunk, None] * waveform).ravel())
+        np.add.at(mix[:, 1], frames, (right[chunk, None] * waveform).ravel())
+
+
+def convolve_grains(mix, onsets, left, right, waveform):
+    """Sum the grains into an impulse train over the frames they span and convolve it with the waveform"""
+    from scipy import signal
+
+    start = int(onsets.min())
+    span = int(onsets.max()) - start + 1
+    trains = np.empty((span, 2), dtype=np.float32)  # Single precision halves the FFT work
+    trains[:, 0] = np.bincount(onsets - start, weights=left, minlength=span)
+    trains[:, 1] = np.bincount(onsets - start, weights=right, minlength=span)
+    rendered = signal.oaconvolve(trains, waveform[:, None], axes=0)
+    mix[start:start + len(rendered)] += rendered
+
+
+def render_grains(onsets, keys, left, right, waveform_for_key, total_frames):
+    """Mix all grains into a (total_frames, 2) float32 buffer
+
+    Every grain must end within total_frames. Grains are sorted by batch key
+    and split into contiguous segments; each segment is rendered by
+    scatter_grains or convolve_grains, whichever touches fewer samples.
+    """
+    mix = np.zeros((total_frames, 2), dtype=np.float32)
+    if not len(onsets):
+        return mix
+
+    order = np.argsort(keys, kind='stable')
+    keys, onsets, left, right = keys[order], onsets[order], left[order], right[order]
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]))
+
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        waveform = waveform_for_key(int(keys[first]))
+        batch = slice(first, last)
+        span = int(onsets[batch].max() - onsets[batch].min()) + 1
+        if (last - first) * len(waveform) < DIRECT_SUM_RATIO * span:
+            scatter_grains(mix, onsets[batch], left[batch], right[batch], waveform)
+        else:
+            convolve_grains(mix, onsets[batch], left[batch], right[batch], waveform)
+    return mix
+
+
+def resample_retailers(lon, lat, type_codes, points, seed=0):
+    """Draw `points` retailers with replacement and jitter them by up to ~500 m (for load testing)"""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(lon), points)
+    jitter = rng.uniform(-0.005, 0.005, (2, points))
+    return lon[rows] + jitter[0], lat[rows] + jitter[1], type_codes[rows]
+
+
+def build_grains(csv_path=None, output_path=None, scan=None, duration=None, points=None):
+    """Render every retailer as a grain and write the mix; returns the number of grains"""
+    import soundfile as sf
+
+    output_path = project_path(GRAIN_CONFIG["output_path"]) if output_path is None else output_path
+    scan = GRAIN_CONFIG["scan"] if scan is None else scan
+    duration = GRAIN_CONFIG["duration"] if duration is None else duration
+    sample_rate = GRAIN_CONFIG["sample_rate"]
+    if scan not in SCANS:
+        raise ValueError(f"Unknown scan '{scan}', expected one of {', '.join(SCANS)}")
+
+    store = SnapRetailerStore.from_csv(csv_path)
+    lon, lat = store.numeric["longitude"], store.numeric["latitude"]
+    type_codes = store.codes["store_type"]
+    if points:
+        lon, lat, type_codes = resample_retailers(lon, lat, type_codes, points)
+
+    start = time.perf_counter()
+    frequencies = scale_frequencies()
+    onsets, keys, left, right = plan_grains(lon, lat, type_codes, len(frequencies), sample_rate, duration, scan)
+
+    # Unknown store types sound like "Other"; waveforms are built once per store type on first use
+    timbres = GRAIN_CONFIG["timbres"]
+    labels = store.categories["store_type"]
+    waveforms = {}
+
+    def waveform_for_key(key):
+        code, degree = divmod(key, len(frequencies))
+        if code not in waveforms:
+            timbre = timbres.get(labels[code], timbres["Other"])
+            waveforms[code] = grain_waveforms(timbre, frequencies, sample_rate, GRAIN_CONFIG["grain_length"])
+        return waveforms[code][degree]
+
+    grain_frames = int(round(GRAIN_CONFIG["grain_length"] * sample_rate))
+    total_frames = (int(onsets.max()) if len(onsets) else 0) + grain_frames
+    mix = render_grains(onsets, keys, left, right, waveform_for_key, total_frames)
+    peak = float(np.max(np.abs(mix))) if mix.size else 0.0
+    if peak > 0:
+        mix *= GRAIN_CONFIG["peak"] / peak
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    sf.write(output_path, mix, sample_rate, subtype="PCM_16")
+
+    print(f"🏪 {len(onsets)} retailers → {len(np.unique(keys))} grain batches "
+          f"({len(waveforms)} timbres × {len(frequencies)} pitches), scan {scan}")
+    print(f"🎶 {total_frames / sample_rate:.1f}s of audio rendered in {elapsed:.2f}s → {output_path}")
+    return len(onsets)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Render every SNAP retailer as a synthesized note")
+    parser.add_argument("--csv", default=None, help="SNAP retailer CSV (defaults to SNAP_CONFIG)")
+    parser.add_argument("--output", default=None, help="output WAV (defaults to GRAIN_CONFIG)")
+    parser.add_argument("--scan", default=None, choices=SCANS, help="scan path that sets each note's onset")
+    parser.add_argument("--duration", type=float, default=None, help="seconds the scan takes")
+    parser.add_argument("--points", type=int, default=None,
+                        help="resample the retailers to this many jittered points to test large datasets")
+    args = parser.parse_args()
+
+    print("🎹 SNAP Retailer Grain Synth")
+    print("=" * 40)
+
+    build_grains(args.csv, args.output, args.scan, args.duration, args.points)
+
+
+if __name__ == "__main__":
+    main()
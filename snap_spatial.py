@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Spatial index over SNAP retailer locations
+
+Builds a KD-tree once over the projected Web Mercator `x`/`y` columns of
+the SNAP data and answers k-nearest, radius-count and bounding-box queries
+for many query points in a single vectorized call. Distances and radii are
+in ground meters: Web Mercator stretches lengths by 1/cos(latitude), so
+each query converts between ground and projected units at its own latitude.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from snap_store import SnapRetailerStore
+
+EARTH_RADIUS = 6378137.0  # Web Mercator sphere radius in meters
+
+
+def lonlat_to_mercator(lon, lat):
+    """Project longitude/latitude degrees to Web Mercator x/y meters"""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    x = EARTH_RADIUS * np.radians(lon)
+    y = EARTH_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+
+def mercator_scale(y):
+    """Return the ground meters per projected meter at Web Mercator y"""
+    latitude = 2 * np.arctan(np.exp(np.asarray(y, dtype=np.float64) / EARTH_RADIUS)) - np.pi / 2
+    return np.cos(latitude)
+
+
+class RetailerSpatialIndex:
+    """KD-tree over projected retailer coordinates"""
+
+    def __init__(self, x, y, rows=None, leafsize=32):
+        from scipy.spatial import cKDTree
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = np.isfinite(x) & np.isfinite(y)
+        rows = np.arange(len(x)) if rows is None else np.asarray(rows)
+
+        self.x = x[valid]
+        self.y = y[valid]
+        self.rows = rows[valid]  # Position of each indexed point in the source store
+        self.tree = cKDTree(np.column_stack((self.x, self.y)), leafsize=leafsize)
+        self._x_order = np.argsort(self.x)
+
+    @classmethod
+    def from_store(cls, store, **filters):
+        """Index the retailers of a SnapRetailerStore that match `filters`"""
+        mask = store.mask(**filters) if filters else np.ones(len(store), dtype=bool)
+        rows = np.flatnonzero(mask)
+        return cls(store.numeric["x"][rows], store.numeric["y"][rows], rows=rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def nearest(self, qx, qy, k=1):
+        """Return ground distances (m) and store rows of the `k` nearest retailers to each query point"""
+        qx = np.asarray(qx, dtype=np.float64)
+        qy = np.asarray(qy, dtype=np.float64)
+        k = min(k, len(self))
+        if k == 0:
+            shape = qx.shape + (0,)
+            return np.empty(shape), np.empty(shape, dtype=np.int64)
+
+        distances, positions = self.tree.query(np.column_stack((qx.ravel(), qy.ravel())), k=k, workers=-1)
+        distances = np.asarray(distances).reshape(qx.shape + (k,))
+        positions = np.asarray(positions).reshape(qx.shape + (k,))
+        distances *= mercator_scale(qy)[..., None]
+        return distances, self.rows[positions]
+
+    def count_within(self, qx, qy, radius):
+        """Count retailers within `radius` ground meters of each query point"""
+        qx = np.asarray(qx, dtype=np.float64)
+        qy = np.asarray(qy, dtype=np.float64)
+        projected_radius = np.broadcast_to(np.asarray(radius, dtype=np.float64) / mercator_scale(qy), qx.shape)
+        counts = self.tree.query_ball_point(
+            np.column_stack((qx.ravel(), qy.ravel())), projected_radius.ravel(),
+            return_length=True, workers=-1
+        )
+        return np.asarray(counts).reshape(qx.shape)
+
+    def in_bbox(self, min_x, min_y, max_x, max_y):
+        """Return store rows inside each projected bounding box (one array per box)"""
+        bounds = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                       for v in (min_x, min_y, max_x, max_y)))
+        sorted_x = self.x[self._x_order]
+        starts = np.searchsorted(sorted_x, bounds[0], side='left')
+        stops = np.searchsorted(sorted_x, bounds[2], side='right')
+
+        results = []
+        for start, stop, low_y, high_y in zip(starts, stops, bounds[1], bounds[3]):
+            candidates = self._x_order[start:stop]
+            inside = (self.y[candidates] >= low_y) & (self.y[candidates] <= high_y)
+            results.append(self.rows[candidates[inside]])
+        return results
+
+    def count_in_bbox(self, min_x, min_y, max_x, max_y):
+        """Count retailers inside each projected bounding box"""
+        return np.array([len(rows) for rows in self.in_bbox(min_x, min_y, max_x, max_y)], dtype=np.int64)
+
+
+def distance_to_nearest(store, qx, qy, **filters):
+    """Ground distance (m) from each query point to the nearest retailer matching `filters`"""
+    index = RetailerSpatialIndex.from_store(store, **filters)
+    if len(index) == 0:
+        return np.full(np.shape(qx), np.inf)
+    distances, _ = index.nearest(qx, qy, k=1)
+    return distances[..., 0]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Proximity queries over SNAP retailers")
+    parser.add_argument("--csv", default=None, help="SNAP retailer CSV (defaults to SNAP_CONFIG)")
+    parser.add_argument("--store-type", default="Supermarket", help="store type to measure distance to")
+    parser.add_argument("--radius", type=float, default=1000, help="radius in meters for neighbor counts")
+    args = parser.parse_args()
+
+    store = SnapRetailerStore.from_csv(args.csv)
+    qx, qy = store.numeric["x"], store.numeric["y"]
+    valid = np.isfinite(qx) & np.isfinite(qy)
+    qx, qy = qx[valid], qy[valid]
+
+    start = time.perf_counter()
+    index = RetailerSpatialIndex.from_store(store)
+    target = RetailerSpatialIndex.from_store(store, store_type=args.store_type)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    distances, _ = target.nearest(qx, qy)
+    neighbors = index.count_within(qx, qy, args.radius)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📍 Indexed {len(index)} retailers ({len(target)} {args.store_type}) in {build_ms:.1f} ms")
+    print(f"⚡ {len(qx)} nearest + radius queries in {query_ms:.1f} ms")
+    print(f"📏 Distance to nearest {args.store_type}: "
+          f"median {np.median(distances):.0f} m, 90th pct {np.percentile(distances, 90):.0f} m, "
+          f"max {np.max(distances):.0f} m")
+    print(f"🏪 Retailers within {args.radius:.0f} m: median {np.median(neighbors):.0f}, max {np.max(neighbors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Columnar in-memory store for SNAP retailer data
+
+Loads the SNAP retailer CSV into NumPy column arrays. Categorical columns
+(ZIP code, store type, city, incentive program, ...) are dictionary-encoded
+as integer codes so group-by and filter queries run as vectorized
+bincount/isin/argsort operations instead of per-row dictionaries.
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+from config import SNAP_CONFIG, project_path
+
+# Store column name -> CSV header for dictionary-encoded columns
+CATEGORICAL_COLUMNS = {
+    "zip": "Zip Code",
+    "store_type": "Store Type",
+    "city": "City",
+    "state": "State",
+    "county": "County",
+    "incentive_program": "Incentive Program",
+}
+
+# Store column name -> CSV header for numeric columns
+NUMERIC_COLUMNS = {
+    "latitude": "Latitude",
+    "longitude": "Longitude",
+    "x": "x",
+    "y": "y",
+}
+
+CHUNK_ROWS = 65536  # Rows parsed per chunk while loading
+
+
+class SnapRetailerStore:
+    """SNAP retailers held as columnar arrays with dictionary-encoded categories"""
+
+    def __init__(self, codes, categories, numeric, names):
+        self.codes = codes            # column -> int32 code array
+        self.categories = categories  # column -> array of category labels
+        self.numeric = numeric        # column -> float64 array
+        self.names = names            # store names, kept for result display
+
+    @classmethod
+    def from_csv(cls, csv_path=None, chunk_rows=CHUNK_ROWS):
+        """Load a SNAP retailer CSV into a new store, `chunk_rows` rows at a time"""
+        csv_path = project_path(SNAP_CONFIG["csv_path"]) if csv_path is None else csv_path
+
+        encoders = {column: {} for column in CATEGORICAL_COLUMNS}
+        code_chunks = {column: [] for column in CATEGORICAL_COLUMNS}
+        numeric_chunks = {column: [] for column in NUMERIC_COLUMNS}
+        name_chunks = []
+
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = [h.strip() for h in next(reader)]
+            index = {name: i for i, name in enumerate(header)}
+
+            required = list(CATEGORICAL_COLUMNS.values()) + list(NUMERIC_COLUMNS.values()) + ["Store Name"]
+            missing = [h for h in required if h not in index]
+            if missing:
+                raise ValueError(f"SNAP CSV is missing columns: {', '.join(missing)}")
+
+            for chunk in _read_chunks(reader, len(header), chunk_rows):
+                # Dictionary-encode while streaming so raw strings never pile up
+                for column, header_name in CATEGORICAL_COLUMNS.items():
+                    table, position = encoders[column], index[header_name]
+                    code_chunks[column].append(np.fromiter(
+                        (table.setdefault(row[position].strip(), len(table)) for row in chunk),
+                        dtype=np.int32, count=len(chunk)
+                    ))
+                for column, header_name in NUMERIC_COLUMNS.items():
+                    position = index[header_name]
+                    numeric_chunks[column].append(_to_float([row[position] for row in chunk]))
+                position = index["Store Name"]
+                name_chunks.append(np.array([row[position] for row in chunk], dtype=object))
+
+        codes, categories = {}, {}
+        for column, table in encoders.items():
+            # Re-number codes so categories are sorted and can be binary-searched
+            labels = np.array(list(table), dtype=str)
+            order = np.argsort(labels, kind='stable')
+            remap = np.empty(len(order), dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            categories[column] = labels[order]
+            codes[column] = remap[_concat(code_chunks[column], np.int32)]
+
+        numeric = {column: _concat(chunks, np.float64) for column, chunks in numeric_chunks.items()}
+        return cls(codes, categories, numeric, _concat(name_chunks, object))
+
+    def __len__(self):
+        return len(self.names)
+
+    # Filtering
+
+    def mask(self, **filters):
+        """Return a boolean mask of rows matching every `column=value(s)` filter"""
+        result = np.ones(len(self), dtype=bool)
+        for column, wanted in filters.items():
+            if column in self.numeric:
+                low, high = wanted
+                values = self.numeric[column]
+                result &= (values >= low) & (values <= high)
+                continue
+
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            wanted_codes = self.lookup(column, wanted)
+            result &= np.isin(self.codes[column], wanted_codes)
+        return result
+
+    def lookup(self, column, labels):
+        """Return the codes of `labels` in a categorical column (unknown labels are dropped)"""
+        categories = self.categories[column]
+        labels = np.asarray(labels, dtype=str)
+        positions = np.searchsorted(categories, labels)
+        positions = np.clip(positions, 0, max(len(categories) - 1, 0))
+        found = categories[positions] == labels if len(categories) else np.zeros(len(labels), dtype=bool)
+        return positions[found]
+
+    def filter(self, mask=None, **filters):
+        """Return a new store holding only the rows selected by `mask` and `filters`"""
+        if mask is None:
+            mask = self.mask(**filters)
+        elif filters:
+            mask = mask & self.mask(**filters)
+        return SnapRetailerStore(
+            {column: codes[mask] for column, codes in self.codes.items()},
+            self.categories,
+            {column: values[mask] for column, values in self.numeric.items()},
+            self.names[mask],
+        )
+
+    def recode(self, column, values):
+        """Return a new store with categorical `column` replaced by the labels in `values`"""
+        labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        codes = dict(self.codes)
+        categories = dict(self.categories)
+        codes[column] = inverse.astype(np.int32).reshape(-1)
+        categories[column] = labels
+        return SnapRetailerStore(codes, categories, self.numeric, self.names)
+
+    # Group-by queries
+
+    def count_by(self, column, mask=None):
+        """Count rows per category of `column`, returned as a {label: count} dict"""
+        codes = self.codes[column] if mask is None else self.codes[column][mask]
+        counts = np.bincount(codes, minlength=len(self.categories[column]))
+        nonzero = np.flatnonzero(counts)
+        return dict(zip(self.categories[column][nonzero].tolist(), counts[nonzero].tolist()))
+
+    def top_k(self, column, k=10, mask=None):
+        """Return the `k` most frequent categories of `column` as (label, count) pairs"""
+        codes = self.codes[column] if mask is None else self.codes[column][mask]
+        counts = np.bincount(codes, minlength=len(self.categories[column]))
+        k = min(k, np.count_nonzero(counts))
+        if k <= 0:
+            return []
+        top = np.argpartition(counts, -k)[-k:]
+        # Ties are broken by label so results are stable
+        top = top[np.lexsort((top, -counts[top]))]
+        return list(zip(self.categories[column][top].tolist(), counts[top].tolist()))
+
+    def crosstab(self, row_column, col_column, mask=None):
+        """Count rows per (row category, column category) pair as a 2-D array"""
+        rows = self.codes[row_column]
+        cols = self.codes[col_column]
+        if mask is not None:
+            rows, cols = rows[mask], cols[mask]
+        n_rows = len(self.categories[row_column])
+        n_cols = len(self.categories[col_column])
+        counts = np.bincount(rows.astype(np.int64) * n_cols + cols, minlength=n_rows * n_cols)
+        return self.categories[row_column], self.categories[col_column], counts.reshape(n_rows, n_cols)
+
+    def mean_by(self, column, value_column, mask=None):
+        """Return the per-category mean of a numeric column, ignoring missing values"""
+        codes = self.codes[column]
+        values = self.numeric[value_column]
+        valid = ~np.isnan(values)
+        if mask is not None:
+            valid &= mask
+        n = len(self.categories[column])
+        totals = np.bincount(codes[valid], weights=values[valid], minlength=n)
+        counts = np.bincount(codes[valid], minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return totals / counts
+
+
+def _read_chunks(reader, width, chunk_rows):
+    """Yield lists of up to `chunk_rows` non-empty rows padded to `width` fields"""
+    chunk = []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _concat(chunks, dtype):
+    """Concatenate per-chunk arrays, handling files with no data rows"""
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+
+def _to_float(values):
+    """Convert CSV strings to float64, using NaN for blanks and zero coordinates"""
+    result = np.array([v or 'nan' for v in values], dtype=np.float64)
+    result[result == 0] = np.nan
+    return result
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Query the SNAP retailer data")
+    parser.add_argument("--csv", default=None, help="SNAP retailer CSV (defaults to SNAP_CONFIG)")
+    parser.add_argument("--top", type=int, default=10, help="number of ZIP codes to list")
+    parser.add_argument("--city", default=None, help="show the store-type mix for one city")
+    parser.add_argument("--by", default="incentive_program", choices=sorted(CATEGORICAL_COLUMNS),
+                        help="column to count retailers by")
+    args = parser.parse_args()
+
+    store = SnapRetailerStore.from_csv(args.csv)
+    print(f"🏪 Loaded {len(store)} SNAP retailers")
+
+    print(f"\n📊 Top {args.top} ZIP codes by store count:")
+    for zip_code, count in store.top_k("zip", args.top):
+        print(f"   {zip_code}: {count}")
+
+    print(f"\n📊 Retailers by {args.by}:")
+    for label, count in store.count_by(args.by).items():
+        print(f"   {label or '(none)'}: {count}")
+
+    if args.city:
+        print(f"\n📊 Store-type mix in {args.city}:")
+        for label, count in store.count_by("store_type", store.mask(city=args.city)).items():
+            print(f"   {label}: {count}")
+
+
+if __name__ == "__main__":
+    main()
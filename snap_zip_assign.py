@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Assign SNAP retailers to ZIP code polygons by point-in-polygon
+
+Instead of trusting each row's `Zip Code` column, every retailer is placed
+in the ZIP boundary polygon that actually contains it. Candidate points for
+each polygon are pruned with a bounding-box index over x-sorted points, and
+the remaining candidates are tested against all edges of the polygon at once
+with a vectorized even-odd ray-casting test.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import SNAP_CONFIG, project_path
+from snap_store import SnapRetailerStore
+
+MAX_CHUNK_CELLS = 4_000_000  # Points x edges evaluated per ray-casting batch
+
+
+def iter_polygon_rings(geometry):
+    """Yield every ring of a Polygon or MultiPolygon geometry as an (N, 2) array"""
+    if not geometry:
+        return
+    if geometry.get('type') == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry.get('type') == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return
+    for polygon in polygons:
+        for ring in polygon:
+            if len(ring) >= 3:
+                yield np.asarray(ring, dtype=np.float64)[:, :2]
+
+
+def load_zip_polygons(geojson_path=None, zip_property="ZIPCODE"):
+    """Load ZIP boundaries as a list of (zip code, edge array) pairs"""
+    geojson_path = project_path(SNAP_CONFIG["boundaries_path"]) if geojson_path is None else geojson_path
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+
+    polygons = []
+    for feature in features:
+        zip_code = str((feature.get('properties') or {}).get(zip_property) or '').strip()
+        edges = polygon_edges(feature.get('geometry'))
+        if zip_code and len(edges):
+            polygons.append((zip_code, edges))
+    return polygons
+
+
+def polygon_edges(geometry):
+    """Return all ring edges of a geometry as an (E, 4) array of x0, y0, x1, y1"""
+    edges = []
+    for ring in iter_polygon_rings(geometry):
+        # Close the ring if the source left it open
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack((ring, ring[:1]))
+        edges.append(np.hstack((ring[:-1], ring[1:])))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+def points_in_polygon(px, py, edges):
+    """Even-odd test of points against every edge of a polygon (holes and parts included)"""
+    inside = np.zeros(len(px), dtype=bool)
+    if len(px) == 0 or len(edges) == 0:
+        return inside
+
+    x0, y0, x1, y1 = (edges[:, i] for i in range(4))
+    # Horizontal edges never cross the ray; dropping them also avoids dividing by zero
+    keep = y0 != y1
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    slope = (x1 - x0) / (y1 - y0)
+
+    step = max(1, MAX_CHUNK_CELLS // max(len(x0), 1))
+    for start in range(0, len(px), step):
+        cx = px[start:start + step, None]
+        cy = py[start:start + step, None]
+        straddles = (y0 > cy) != (y1 > cy)
+        crossing_x = x0 + (cy - y0) * slope
+        crossings = np.count_nonzero(straddles & (cx < crossing_x), axis=1)
+        inside[start:start + step] = (crossings & 1).astype(bool)
+    return inside
+
+
+def assign_points(px, py, polygons):
+    """Return the ZIP code of the polygon containing each point ('' when outside all)"""
+    px = np.asarray(px, dtype=np.float64)
+    py = np.asarray(py, dtype=np.float64)
+    assigned = np.full(len(px), -1, dtype=np.int64)
+
+    valid = np.flatnonzero(np.isfinite(px) & np.isfinite(py))
+    order = valid[np.argsort(px[valid])]
+    sorted_x = px[order]
+
+    for polygon_index, (_, edges) in enumerate(polygons):
+        min_x = min(edges[:, 0].min(), edges[:, 2].min())
+        max_x = max(edges[:, 0].max(), edges[:, 2].max())
+        min_y = min(edges[:, 1].min(), edges[:, 3].min())
+        max_y = max(edges[:, 1].max(), edges[:, 3].max())
+
+        start = np.searchsorted(sorted_x, min_x, side='left')
+        stop = np.searchsorted(sorted_x, max_x, side='right')
+        candidates = order[start:stop]
+        candidates = candidates[(py[candidates] >= min_y) & (py[candidates] <= max_y) & (assigned[candidates] < 0)]
+        if len(candidates) == 0:
+            continue
+
+        hits = candidates[points_in_polygon(px[candidates], py[candidates], edges)]
+        assigned[hits] = polygon_index
+
+    zip_codes = np.array([zip_code for zip_code, _ in polygons] + [''], dtype=str)
+    return zip_codes[assigned]
+
+
+def assign_store(store, polygons):
+    """Assign every retailer in a SnapRetailerStore to its containing ZIP polygon"""
+    return assign_points(store.numeric["longitude"], store.numeric["latitude"], polygons)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Assign SNAP retailers to ZIP polygons")
+    parser.add_argument("--csv", default=None, help="SNAP retailer CSV (defaults to SNAP_CONFIG)")
+    parser.add_argument("--geojson", default=None, help="ZIP boundary GeoJSON (defaults to SNAP_CONFIG)")
+    parser.add_argument("--show", type=int, default=10, help="number of mismatches to list")
+    args = parser.parse_args()
+
+    geojson_path = project_path(SNAP_CONFIG["boundaries_path"]) if args.geojson is None else args.geojson
+    if not os.path.exists(geojson_path):
+        print(f"❌ Error: Boundary file not found: {geojson_path}")
+        print("💡 Run filter_geojson.py first to create the King County boundary file.")
+        return
+
+    store = SnapRetailerStore.from_csv(args.csv)
+    polygons = load_zip_polygons(geojson_path)
+
+    start = time.perf_counter()
+    assigned = assign_store(store, polygons)
+    elapsed = time.perf_counter() - start
+
+    listed = store.categories["zip"][store.codes["zip"]]
+    outside = assigned == ''
+    mismatched = ~outside & (assigned != listed)
+
+    print(f"📍 Assigned {len(store)} retailers to {len(polygons)} ZIP polygons in {elapsed * 1000:.1f} ms")
+    print(f"✅ Matching listed ZIP: {np.count_nonzero(~outside & ~mismatched)}")
+    print(f"⚠️  Listed ZIP differs from polygon: {np.count_nonzero(mismatched)}")
+    print(f"❓ Outside every polygon: {np.count_nonzero(outside)}")
+    for row in np.flatnonzero(mismatched)[:args.show]:
+        print(f"   - {store.names[row].strip()}: listed {listed[row]}, located in {assigned[row]}")
+
+
+if __name__ == "__main__":
+    main()
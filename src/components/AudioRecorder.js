@@ -114,7 +114,7 @@ const AudioRecorder = ({ onRecordingComplete }) => {
         const audioData = Array.from(channelData);
         
         // Normalize audio
-        const maxAmplitude = Math.max(...audioData.map(Math.abs));
+        const maxAmplitude = audioData.reduce((peak, sample) => Math.max(peak, Math.abs(sample)), 0);
         if (maxAmplitude > 0) {
           const normalizedAudio = audioData.map(sample => (sample / maxAmplitude) * 0.8);
           onRecordingComplete(normalizedAudio, audioBuffer.sampleRate);
@@ -97,8 +97,12 @@ export const applyWaveformTransformation = (audioData, waveformData) => {
     const samplesPerSegment = Math.floor(sampleRate * segmentDuration);
     
     // Find min/max Y values from waveform for octave mapping
-    const maxY = Math.max(...waveformData.y);
-    const minY = Math.min(...waveformData.y);
+    let maxY = -Infinity;
+    let minY = Infinity;
+    for (const y of waveformData.y) {
+      if (y > maxY) maxY = y;
+      if (y < minY) minY = y;
+    }
     const yRange = maxY - minY;
     
     // Calculate total duration and number of segments
@@ -162,30 +166,29 @@ export const applyWaveformTransformation = (audioData, waveformData) => {
       }
     }
     
-    // Apply subtle compression to smooth out any artifacts
-    const compressedAudio = new Float32Array(audioLength);
+    // Apply subtle compression to smooth out any artifacts, tracking the peak in the same pass
+    // (spreading a long array into Math.max overflows the call stack)
+    const finalAudio = transformedAudio;
     const threshold = 0.8;
     const ratio = 4;
+    let maxAudio = 0;
     
     for (let i = 0; i < audioLength; i++) {
-      const sample = transformedAudio[i];
-      if (Math.abs(sample) > threshold) {
-        const excess = Math.abs(sample) - threshold;
-        const compressedExcess = excess / ratio;
-        const sign = sample >= 0 ? 1 : -1;
-        compressedAudio[i] = sign * (threshold + compressedExcess);
-      } else {
-        compressedAudio[i] = sample;
+      const sample = finalAudio[i];
+      let magnitude = Math.abs(sample);
+      if (magnitude > threshold) {
+        magnitude = threshold + (magnitude - threshold) / ratio;
+        finalAudio[i] = sample >= 0 ? magnitude : -magnitude;
       }
+      if (magnitude > maxAudio) maxAudio = magnitude;
     }
     
-    // Normalize audio
-    const maxAudio = Math.max(...compressedAudio.map(Math.abs));
-    let finalAudio;
+    // Normalize audio in place
     if (maxAudio > 0) {
-      finalAudio = compressedAudio.map(sample => (sample / maxAudio) * 0.9);
-    } else {
-      finalAudio = compressedAudio;
+      const scale = 0.9 / maxAudio;
+      for (let i = 0; i < audioLength; i++) {
+        finalAudio[i] *= scale;
+      }
     }
     
     // Store octave data for visualization
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Build normalized music stem assets and a manifest for the SNAP music map
+
+Every stem listed in MUSIC_CONFIG["instrument_stems"] is converted to one
+sample rate, channel count and sample format, and cut to a whole number of
+bars at the configured tempo. Audio running past the last bar (reverb and
+release tails) is wrapped onto the start, so the loop repeats seamlessly.
+Each asset is written as WAV plus the compressed formats in
+MUSIC_CONFIG["compressed_formats"]. File names carry a content hash, so
+run_demo_server.py serves them as immutable.
+
+manifest.json lists, per instrument, each stem's files, duration, loop
+points, peak and loudness. The client can schedule playback without first
+decoding the audio.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from config import MUSIC_CONFIG, project_path
+from loudness import integrated_loudness
+from stem_premix import read_stem, rms
+
+# soundfile format and subtype for each compressed variant
+COMPRESSED_FORMATS = {
+    "flac": ("FLAC", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
+
+ASSET_NAME = re.compile(r'\.[0-9a-f]{8}\.(wav|flac|ogg|mp3)$')  # Names written by build_asset
+
+
+def bar_frames(sample_rate, bpm=None, beats_per_bar=None):
+    """Length of one bar in frames (not necessarily a whole number)"""
+    bpm = MUSIC_CONFIG["bpm"] if bpm is None else bpm
+    beats_per_bar = MUSIC_CONFIG["beats_per_bar"] if beats_per_bar is None else beats_per_bar
+    return sample_rate * 60.0 / bpm * beats_per_bar
+
+
+def trim_to_bars(audio, frames_per_bar):
+    """Cut audio to the nearest whole number of bars, wrapping any overhang onto the start
+
+    Returns (loop, bars). Bar boundaries are rounded once for the whole loop,
+    so rounding error never accumulates across bars.
+    """
+    bars = max(1, int(round(len(audio) / frames_per_bar)))
+    length = int(round(bars * frames_per_bar))
+    loop = np.zeros((length,) + audio.shape[1:], dtype=audio.dtype)
+    head = audio[:length]
+    loop[:len(head)] = head
+    overhang = audio[length:]
+    while len(overhang):
+        loop[:len(overhang[:length])] += overhang[:length]
+        overhang = overhang[length:]
+    return loop, bars
+
+
+def to_dbfs(value):
+    """Convert a linear amplitude to dBFS, rounded for the manifest"""
+    return round(20 * np.log10(value), 2) if value > 0 else None
+
+
+def to_lufs(value):
+    """Round an integrated loudness for the manifest (None for silence)"""
+    return round(float(value), 2) if np.isfinite(value) else None
+
+
+def slugify(name):
+    """Turn a stem file name into a URL-safe asset name"""
+    return re.sub(r'[^a-z0-9]+', '-', os.path.splitext(name)[0].lower()).strip('-')
+
+
+def content_hash(audio):
+    """Short hash of the sample data, used to version asset file names"""
+    return hashlib.blake2b(np.ascontiguousarray(audio).tobytes(), digest_size=4).hexdigest()
+
+
+def build_asset(source_path, output_dir, sample_rate, channels, formats):
+    """Normalize, trim and encode one stem; returns its manifest entry"""
+    import soundfile as sf
+
+    audio, _ = read_stem(source_path, sample_rate)
+    if channels == 1:
+        audio = audio.mean(axis=1, keepdims=True)
+
+    frames_per_bar = bar_frames(sample_rate)
+    loop, bars = trim_to_bars(audio, frames_per_bar)
+    peak = float(np.max(np.abs(loop))) if loop.size else 0.0
+    if peak > 1.0:
+        # Wrapped tails can push the loop past full scale; keep integer encodings from clipping
+        loop *= 1.0 / peak
+        peak = 1.0
+
+    # Hash the encoded integer samples so the name changes exactly when the WAV does
+    pcm = np.round(np.clip(loop, -1.0, 1.0) * 32767).astype(np.int16)
+    base = f"{slugify(os.path.basename(source_path))}.{content_hash(pcm)}"
+
+    files = {"wav": f"{base}.wav"}
+    sf.write(os.path.join(output_dir, files["wav"]), loop, sample_rate, subtype=MUSIC_CONFIG["asset_subtype"])
+    for extension in formats:
+        file_format, subtype = COMPRESSED_FORMATS[extension]
+        files[extension] = f"{base}.{extension}"
+        sf.write(os.path.join(output_dir, files[extension]), loop, sample_rate, format=file_format, subtype=subtype)
+
+    duration = len(loop) / sample_rate
+    return {
+        "source": os.path.basename(source_path),
+        "files": files,
+        "bytes": {extension: os.path.getsize(os.path.join(output_dir, name)) for extension, name in files.items()},
+        "frames": len(loop),
+        "duration": round(duration, 6),
+        "bars": bars,
+        "loopStart": 0.0,
+        "loopEnd": round(duration, 6),
+        "peakDbfs": to_dbfs(peak),
+        "loudness": {"rmsDbfs": to_dbfs(rms(loop)), "lufs": to_lufs(integrated_loudness(loop, sample_rate))},
+    }
+
+
+def build_assets(output_dir=None, formats=None):
+    """Build every stem asset and write the manifest; returns the manifest dict"""
+    output_dir = project_path(MUSIC_CONFIG["asset_dir"]) if output_dir is None else output_dir
+    formats = MUSIC_CONFIG["compressed_formats"] if formats is None else formats
+    sample_rate = MUSIC_CONFIG["asset_sample_rate"]
+    channels = MUSIC_CONFIG["asset_channels"]
+
+    unknown = [extension for extension in formats if extension not in COMPRESSED_FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported compressed formats: {', '.join(unknown)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    previous = {name for name in os.listdir(output_dir) if ASSET_NAME.search(name)}
+
+    instruments = {}
+    start = time.perf_counter()
+    for instrument, names in MUSIC_CONFIG["instrument_stems"].items():
+        stems = []
+        for name in names:
+            path = os.path.join(project_path(MUSIC_CONFIG["stems_dir"]), name)
+            if not os.path.exists(path):
+                print(f"⚠️  Missing stem for {instrument}: {path}")
+                continue
+            entry = build_asset(path, output_dir, sample_rate, channels, formats)
+            stems.append(entry)
+            sizes = ", ".join(f"{extension} {size / 1024:.0f} KB" for extension, size in entry["bytes"].items())
+            print(f"   {instrument}: {entry['source']} → {entry['bars']} bars, {entry['duration']:.3f}s, "
+                  f"peak {entry['peakDbfs']} dBFS ({sizes})")
+        if stems:
+            instruments[instrument] = stems
+
+    manifest = {
+        "bpm": MUSIC_CONFIG["bpm"],
+        "beatsPerBar": MUSIC_CONFIG["beats_per_bar"],
+        "sampleRate": sample_rate,
+        "channels": channels,
+        "barDuration": round(bar_frames(sample_rate) / sample_rate, 6),
+        "formats": ["wav"] + list(formats),
+        "instruments": instruments,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+    # Assets from earlier runs whose content has since changed are no longer referenced
+    current = {name for stems in instruments.values() for stem in stems for name in stem["files"].values()}
+    for name in previous - current:
+        os.remove(os.path.join(output_dir, name))
+
+    count = sum(len(stems) for stems in instruments.values())
+    print(f"✅ {count} stems normalized to {sample_rate} Hz / {channels} ch in "
+          f"{time.perf_counter() - start:.1f}s → {output_dir}")
+    return manifest
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Normalize, trim and encode the music map stems")
+    parser.add_argument("--output", default=None, help="asset directory (defaults to MUSIC_CONFIG)")
+    parser.add_argument("--formats", nargs="*", default=None, choices=sorted(COMPRESSED_FORMATS),
+                        help="compressed variants to write next to each WAV")
+    args = parser.parse_args()
+
+    print("🎼 Music Stem Asset Builder")
+    print("=" * 40)
+
+    build_assets(args.output, args.formats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Premix the SNAP music map stems for every store-type combination
+
+demo.html plays one buffer source per stem for each store type in a ZIP
+code (up to 10 at once) and decodes every stem in the browser. This script
+reads the stems in Music/ once, builds one level-balanced layer per
+instrument and sums the layers of each of the 2^7 store-type combinations
+into a single premixed loop. The map then plays one buffer per ZIP.
+
+Each premix is named by a bit string over the store types in
+SNAP_CONFIG["store_type_instruments"] order (premix_1000001.wav = Grocery
+Store + Other). index.json records that order and a signature of the source
+stems, so unchanged premixes are not rendered again.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from config import MUSIC_CONFIG, SNAP_CONFIG, project_path
+
+
+def stems_signature(paths):
+    """Hash the names, sizes and modification times of the source stems"""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def read_stem(path, sample_rate=None):
+    """Read a stem as float32 stereo frames, resampling to `sample_rate` if given"""
+    import soundfile as sf
+
+    audio, rate = sf.read(path, dtype='float32', always_2d=True)
+    if audio.shape[1] == 1:
+        audio = np.repeat(audio, 2, axis=1)
+    elif audio.shape[1] > 2:
+        audio = audio[:, :2]
+    if sample_rate and rate != sample_rate:
+        from math import gcd
+        from scipy import signal
+
+        divisor = gcd(sample_rate, rate)
+        audio = signal.resample_poly(audio, sample_rate // divisor, rate // divisor, axis=0).astype(np.float32)
+        rate = sample_rate
+    return audio, rate
+
+
+def rms(audio):
+    """Root-mean-square level of a buffer"""
+    return float(np.sqrt(np.mean(np.square(audio, dtype=np.float64)))) if audio.size else 0.0
+
+
+def build_layers(stems_dir=None, instrument_stems=None):
+    """Load the stems once and return ({instrument: layer}, sample rate, stem paths)
+
+    Stems of one instrument are averaged (as demo.html plays them at
+    1/count gain), then every instrument layer is scaled to the median RMS
+    of all layers so no single instrument dominates a premix.
+    """
+    stems_dir = project_path(MUSIC_CONFIG["stems_dir"]) if stems_dir is None else stems_dir
+    instrument_stems = MUSIC_CONFIG["instrument_stems"] if instrument_stems is None else instrument_stems
+
+    layers, paths, sample_rate = {}, [], None
+    for instrument, files in instrument_stems.items():
+        stems = []
+        for name in files:
+            path = os.path.join(stems_dir, name)
+            if not os.path.exists(path):
+                print(f"⚠️  Missing stem for {instrument}: {path}")
+                continue
+            audio, sample_rate = read_stem(path, sample_rate)
+            stems.append(audio)
+            paths.append(path)
+        if not stems:
+            continue
+
+        length = max(len(stem) for stem in stems)
+        layer = np.zeros((length, 2), dtype=np.float32)
+        for stem in stems:
+            layer[:len(stem)] += stem
+        layer /= len(stems)  # Average only the stems that loaded
+        layers[instrument] = layer
+
+    levels = [rms(layer) for layer in layers.values() if rms(layer) > 0]
+    if levels:
+        target = float(np.median(levels))
+        for layer in layers.values():
+            level = rms(layer)
+            if level > 0:
+                layer *= target / level
+    return layers, sample_rate, paths
+
+
+def combination_bits(mask, count):
+    """Bit string naming a store-type combination, first store type first"""
+    return ''.join('1' if mask & (1 << i) else '0' for i in range(count))
+
+
+def premix(layers, instruments, peak_ceiling):
+    """Sum the layers of `instruments` (at least one present) into one loop, limited to `peak_ceiling`
+
+    The sum is scaled by 1/sqrt(layers) so dense ZIPs stay about as loud as
+    sparse ones, then scaled down further only if it would exceed the ceiling.
+    """
+    present = [layers[instrument] for instrument in instruments if instrument in layers]
+    mix = np.zeros((max(len(layer) for layer in present), 2), dtype=np.float32)
+    for layer in present:
+        mix[:len(layer)] += layer
+    mix *= 1.0 / np.sqrt(len(present))
+
+    peak = float(np.max(np.abs(mix)))
+    if peak > peak_ceiling:
+        mix *= peak_ceiling / peak
+    return mix
+
+
+def build_premixes(output_dir=None, force=False):
+    """Render every store-type combination into `output_dir`; returns the index dict"""
+    import soundfile as sf
+
+    output_dir = project_path(MUSIC_CONFIG["premix_dir"]) if output_dir is None else output_dir
+    store_types = list(SNAP_CONFIG["store_type_instruments"])
+    index_path = os.path.join(output_dir, "index.json")
+
+    start = time.perf_counter()  # Loading the stems is most of the work, so it is timed too
+    layers, sample_rate, paths = build_layers()
+    if not layers:
+        print("❌ No stems found, nothing to premix")
+        return None
+    signature = stems_signature(paths)
+
+    previous = {}
+    if os.path.exists(index_path) and not force:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    reuse = previous.get("signature") == signature and previous.get("storeTypes") == store_types
+
+    # Store types whose stems are missing add nothing, so combinations differing only there share a file
+    available = sum(1 << i for i, store_type in enumerate(store_types)
+                    if SNAP_CONFIG["store_type_instruments"][store_type] in layers)
+
+    os.makedirs(output_dir, exist_ok=True)
+    files, written = {}, set()
+    for mask in range(1, 2 ** len(store_types)):
+        effective = mask & available
+        if not effective:
+            continue
+        name = f"premix_{combination_bits(effective, len(store_types))}.wav"
+        files[combination_bits(mask, len(store_types))] = name
+        path = os.path.join(output_dir, name)
+        if name in written or (reuse and name in previous.get("files", {}).values() and os.path.exists(path)):
+            continue
+
+        instruments = {SNAP_CONFIG["store_type_instruments"][store_types[i]]
+                       for i in range(len(store_types)) if effective & (1 << i)}
+        sf.write(path, premix(layers, sorted(instruments), MUSIC_CONFIG["premix_peak"]),
+                 sample_rate, subtype=MUSIC_CONFIG["premix_subtype"])
+        written.add(name)
+
+    index = {
+        "storeTypes": store_types,
+        "sampleRate": sample_rate,
+        "signature": signature,
+        "files": files,
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+
+    elapsed = time.perf_counter() - start
+    print(f"🎚️  {len(layers)} instrument layers from {len(paths)} stems at {sample_rate} Hz")
+    print(f"💾 {len(files)} combinations → {len(set(files.values()))} premixes, "
+          f"{len(written)} rendered ({elapsed:.1f}s) → {output_dir}")
+    return index
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Premix music map stems for every store-type combination")
+    parser.add_argument("--output", default=None, help="premix directory (defaults to MUSIC_CONFIG)")
+    parser.add_argument("--force", action="store_true", help="re-render premixes even if the stems are unchanged")
+    args = parser.parse_args()
+
+    print("🎛️  SNAP Stem Premixer")
+    print("=" * 40)
+
+    build_premixes(args.output, args.force)
+
+
+if __name__ == "__main__":
+    main()